@@ -1,56 +1,513 @@
+import bisect
 import csv
-import queue
+import io
+import itertools
+import json
+import math
+import mmap
+import os
+import struct
 import sys
+import time
+import unicodedata
+from array import array
+from collections import deque
 
-from util import Node, StackFrontier, QueueFrontier
+# Binary snapshot of a loaded directory, written next to its CSV files
+SNAPSHOT_NAME = "degrees.snapshot"
+SNAPSHOT_MAGIC = b"DEGREES1"
+SNAPSHOT_SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+SNAPSHOT_ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_stars"]
+SNAPSHOT_STRINGS = [
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years"
+]
 
-# Maps names to a set of corresponding person_ids
+# Precomputed BFS distances from high-degree landmark people, kept
+# in a file next to the CSV files like the snapshot
+LANDMARKS_NAME = "degrees.landmarks"
+LANDMARKS = 16
+
+# Layers a bidirectional search expands before consulting the landmarks
+LANDMARK_DEPTH = 2
+
+# Whether searches prune people by landmark lower bounds, which does not
+# pay off on graphs as small-world as the benchmark's (see degrees_bench)
+LANDMARK_PRUNING = False
+
+# Landmarks that bound distances during one pruned search, the ones that
+# best separate its source and target
+ACTIVE_LANDMARKS = 4
+
+# Landmark distances are uint8: MAX_DISTANCE means "at least that far"
+MAX_DISTANCE = 254
+UNREACHABLE = 255
+
+# Pairs that batch_paths reads and groups before answering them
+BATCH_WINDOW = 10000
+
+# Maps normalized names to a list of corresponding person_ids
 names = {}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
+# Sorted keys of names, built on first use by name_index()
+sorted_names = None
+
+# IMDb ids, names and birth years of people, by dense integer index
+person_ids = []
+person_names = []
+person_births = []
+
+# Maps person_ids to their dense integer index
+person_index = {}
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
+# IMDb ids, titles and years of movies, by dense integer index
+movie_ids = []
+movie_titles = []
+movie_years = []
 
+# Maps movie_ids to their dense integer index
+movie_index = {}
 
-def load_data(directory):
+# Compressed-sparse-row person <-> movie adjacency, as int32 memoryviews:
+# the movies of person p are person_movies[person_offsets[p]:person_offsets[p + 1]]
+# and the stars of movie m are movie_stars[movie_offsets[m]:movie_offsets[m + 1]]
+person_offsets = memoryview(array("i", [0]))
+person_movies = memoryview(array("i"))
+movie_offsets = memoryview(array("i", [0]))
+movie_stars = memoryview(array("i"))
+
+# Edges ingested since the CSR arrays were built, until compact_data():
+# maps person index -> list of added movie indices and vice versa
+added_movies = {}
+added_stars = {}
+
+# [size, mtime_ns] of the CSV files as of the last load or refresh
+loaded_sources = {}
+
+# Landmark person indices and, for each, a uint8 distance per person index
+landmarks = []
+landmark_distances = []
+
+
+def load_data(directory, snapshot=True):
     """
     Load data from CSV files into memory.
+
+    If snapshot is True, the graph is opened from the binary snapshot in
+    the directory when it is still up to date with the CSV files, and a
+    new snapshot is written after parsing them otherwise.
     """
+    if snapshot and load_snapshot(directory):
+        return
+    reset_data()
+    load_csv(directory)
+    if snapshot:
+        try:
+            save_snapshot(directory)
+        except OSError:
+            # Read-only data directories simply don't get a snapshot
+            pass
+
+
+def reset_data():
+    """
+    Empties all loaded data, keeping the same list and dict objects.
+    """
+    global person_offsets, person_movies, movie_offsets, movie_stars
+    global sorted_names
+    sorted_names = None
+    for table in (names, person_index, movie_index,
+                  added_movies, added_stars, loaded_sources):
+        table.clear()
+    for column in (person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   landmarks, landmark_distances):
+        column.clear()
+    person_offsets = memoryview(array("i", [0]))
+    person_movies = memoryview(array("i"))
+    movie_offsets = memoryview(array("i", [0]))
+    movie_stars = memoryview(array("i"))
+
+
+def load_csv(directory):
+    """
+    Parses the people, movies and stars CSV files of a directory.
+    """
+    global person_offsets, person_movies, movie_offsets, movie_stars
+
+    loaded_sources.update(source_stats(directory))
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+            add_person(row)
 
     # Load movies
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
+            add_movie(row)
 
-    # Load stars
+    # Load stars as parallel arrays of (person, movie) edges
+    edge_people = array("i")
+    edge_movies = array("i")
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
+                person = person_index[row["person_id"]]
+                movie = movie_index[row["movie_id"]]
             except KeyError:
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+    person_offsets, person_movies = build_csr(
+        len(person_ids), edge_people, edge_movies
+    )
+    movie_offsets, movie_stars = build_csr(
+        len(movie_ids), edge_movies, edge_people
+    )
+
+
+def add_person(row):
+    """
+    Adds a person from a people.csv row, unless the id is already known.
+    """
+    global sorted_names
+    if row["id"] in person_index:
+        return
+    person_index[row["id"]] = len(person_ids)
+    person_ids.append(row["id"])
+    person_names.append(row["name"])
+    person_births.append(row["birth"])
+    names.setdefault(normalize_name(row["name"]), []).append(row["id"])
+    sorted_names = None
+    for slot in range(len(landmarks)):
+        writable_landmark_row(slot).append(UNREACHABLE)
+
+
+def add_movie(row):
+    """
+    Adds a movie from a movies.csv row, unless the id is already known.
+    """
+    if row["id"] in movie_index:
+        return
+    movie_index[row["id"]] = len(movie_ids)
+    movie_ids.append(row["id"])
+    movie_titles.append(row["title"])
+    movie_years.append(row["year"])
+
+
+def movies_for(person):
+    """
+    Returns the movie indices a person index starred in: a zero-copy
+    slice of the CSR arrays, plus any movies ingested since they were built.
+    """
+    if person + 1 < len(person_offsets):
+        movies = person_movies[person_offsets[person]:person_offsets[person + 1]]
+    else:
+        movies = ()
+    if person in added_movies:
+        return [*movies, *added_movies[person]]
+    return movies
+
+
+def stars_for(movie):
+    """
+    Returns the person indices who starred in a movie index: a zero-copy
+    slice of the CSR arrays, plus any stars ingested since they were built.
+    """
+    if movie + 1 < len(movie_offsets):
+        stars = movie_stars[movie_offsets[movie]:movie_offsets[movie + 1]]
+    else:
+        stars = ()
+    if movie in added_stars:
+        return [*stars, *added_stars[movie]]
+    return stars
+
+
+def apply_delta(people=(), movies=(), stars=()):
+    """
+    Adds people, movies and stars rows (dicts shaped like the CSV rows)
+    to the loaded graph without rebuilding it. Rows that are already
+    known are skipped, so applying the same delta twice is harmless.
+
+    New edges are kept next to the CSR arrays until compact_data(), and
+    landmark distances are lowered only where the new edges shorten them.
+
+    Returns the set of person_ids whose co-stars changed.
+    """
+    for row in people:
+        add_person(row)
+    for row in movies:
+        add_movie(row)
+
+    changed = set()
+    for row in stars:
+        person = person_index.get(row["person_id"])
+        movie = movie_index.get(row["movie_id"])
+        if person is None or movie is None or movie in movies_for(person):
+            continue
+        added_movies.setdefault(person, []).append(movie)
+        added_stars.setdefault(movie, []).append(person)
+        co_stars = stars_for(movie)
+        changed.update(person_ids[star] for star in co_stars)
+        relax_landmarks(co_stars)
+    return changed
+
+
+def refresh_data(directory, save=False):
+    """
+    Ingests the rows appended to the CSV files of a directory since they
+    were loaded (a trailing partial line is left for the next refresh).
+
+    If save is True, the graph is compacted and the snapshot (and any
+    landmarks) rewritten afterwards. If a file was rewritten rather than
+    appended to, everything is reparsed and any landmarks rebuilt, and
+    the landmarks are saved before the snapshot. Without save, such a
+    rewrite is picked up by opening that snapshot once it is written,
+    along with the saved landmarks; until then the loaded data is kept.
+
+    Returns the set of person_ids whose co-stars changed, or None if
+    the data had to be reloaded completely.
+    """
+    current = source_stats(directory)
+    if current == loaded_sources:
+        return set()
+    for filename, (size, mtime) in current.items():
+        if size < loaded_sources[filename][0] or (
+            size == loaded_sources[filename][0] and mtime != loaded_sources[filename][1]
+        ):
+            # A full reload drops the landmarks, so bring back as many
+            count = len(landmarks)
+            if not save:
+                if not load_snapshot(directory):
+                    return set()
+                if count:
+                    read_landmarks(directory, count)
+                return None
+            reset_data()
+            load_csv(directory)
+            if count:
+                load_landmarks(directory, count)
+            try:
+                save_snapshot(directory)
+            except OSError:
                 pass
+            return None
+
+    rows = {}
+    for filename, (size, mtime) in current.items():
+        rows[filename], consumed = appended_rows(
+            os.path.join(directory, filename), loaded_sources[filename][0]
+        )
+        loaded_sources[filename] = [consumed, mtime]
+    changed = apply_delta(rows["people.csv"], rows["movies.csv"], rows["stars.csv"])
+
+    if save:
+        compact_data()
+        try:
+            save_snapshot(directory)
+            if landmarks:
+                save_landmarks(directory)
+        except OSError:
+            pass
+    return changed
+
+
+def appended_rows(path, offset):
+    """
+    Returns the complete CSV rows of a file after a byte offset, as dicts
+    keyed by the file's header, and the offset up to which they were read.
+    """
+    with open(path, "rb") as f:
+        header = f.readline().decode("utf-8")
+        f.seek(offset)
+        data = f.read()
+    data = data[:data.rfind(b"\n") + 1]
+    fieldnames = next(csv.reader([header]))
+    reader = csv.DictReader(io.StringIO(data.decode("utf-8")), fieldnames)
+    return list(reader), offset + len(data)
+
+
+def compact_data():
+    """
+    Folds the edges ingested by apply_delta into freshly built CSR arrays.
+    """
+    global person_offsets, person_movies, movie_offsets, movie_stars
+
+    edge_people = array("i")
+    edge_movies = array("i")
+    for person in range(len(person_ids)):
+        for movie in movies_for(person):
+            edge_people.append(person)
+            edge_movies.append(movie)
+    person_offsets, person_movies = build_csr(
+        len(person_ids), edge_people, edge_movies
+    )
+    movie_offsets, movie_stars = build_csr(
+        len(movie_ids), edge_movies, edge_people
+    )
+    added_movies.clear()
+    added_stars.clear()
+
+
+def build_csr(size, rows, columns):
+    """
+    Builds a compressed-sparse-row adjacency from parallel arrays of
+    (row, column) edges, with each row's columns sorted and deduplicated.
+
+    Returns (offsets, indices) as int32 memoryviews.
+    """
+    # Counting sort the edges by row
+    counts = array("i", bytes(4 * (size + 1)))
+    for row in rows:
+        counts[row + 1] += 1
+    for i in range(size):
+        counts[i + 1] += counts[i]
+    fill = counts[:-1]
+    unsorted = array("i", bytes(4 * len(rows)))
+    for row, column in zip(rows, columns):
+        unsorted[fill[row]] = column
+        fill[row] += 1
+
+    # Sort and deduplicate within each row
+    offsets = array("i", bytes(4 * (size + 1)))
+    indices = array("i")
+    for i in range(size):
+        indices.extend(sorted(set(unsorted[counts[i]:counts[i + 1]])))
+        offsets[i + 1] = len(indices)
+    return memoryview(offsets), memoryview(indices)
+
+
+def source_stats(directory):
+    """
+    Returns the [size, mtime_ns] of every CSV file of a directory,
+    used to tell whether a snapshot is still up to date.
+    """
+    stats = {}
+    for filename in SNAPSHOT_SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        stats[filename] = [stat.st_size, stat.st_mtime_ns]
+    return stats
+
+
+def save_snapshot(directory):
+    """
+    Writes the loaded graph to a binary snapshot in the directory.
+
+    The file holds a JSON header followed by the int32 CSR arrays
+    (8-byte aligned, so they can be mapped straight back into memory)
+    and a NUL-separated UTF-8 string table for ids, names and titles.
+    """
+    header = {
+        "byteorder": sys.byteorder,
+        "sources": loaded_sources,
+        "arrays": {},
+        "strings": {}
+    }
+    sections = []
+    for name in SNAPSHOT_ARRAYS:
+        sections.append((name, "arrays", globals()[name].tobytes(), None))
+    for name in SNAPSHOT_STRINGS:
+        column = globals()[name]
+        data = "\0".join(column).encode("utf-8")
+        sections.append((name, "strings", data, len(column)))
+
+    # Section offsets are relative to the 8-byte aligned end of the header
+    offset = 0
+    for name, kind, data, count in sections:
+        header[kind][name] = [offset, len(data)]
+        if count is not None:
+            header[kind][name].append(count)
+        offset = align(offset + len(data))
+    encoded = json.dumps(header).encode("utf-8")
+    start = align(len(SNAPSHOT_MAGIC) + 4 + len(encoded))
+
+    path = os.path.join(directory, SNAPSHOT_NAME)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack("<I", len(encoded)))
+        f.write(encoded)
+        for name, kind, data, count in sections:
+            f.seek(start + header[kind][name][0])
+            f.write(data)
+    os.replace(temporary, path)
+
+
+def align(offset):
+    """
+    Rounds an offset up to the next multiple of 8 bytes.
+    """
+    return (offset + 7) & ~7
+
+
+def load_snapshot(directory):
+    """
+    Opens the binary snapshot of a directory, mapping the CSR arrays
+    read-only into memory so their pages are shared between processes.
+
+    Returns False, leaving the loaded data alone, if there is no snapshot
+    or it is out of date.
+    """
+    global person_offsets, person_movies, movie_offsets, movie_stars
+
+    path = os.path.join(directory, SNAPSHOT_NAME)
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return False
+
+    start = len(SNAPSHOT_MAGIC) + 4
+    if len(buffer) < start or buffer[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        return False
+    header_size, = struct.unpack("<I", buffer[len(SNAPSHOT_MAGIC):start])
+    try:
+        header = json.loads(buffer[start:start + header_size])
+        if (header["byteorder"] != sys.byteorder
+                or header["sources"] != source_stats(directory)):
+            return False
+    except (OSError, ValueError, KeyError):
+        return False
+
+    view = memoryview(buffer)
+    start = align(start + header_size)
+    arrays = {}
+    columns = {}
+    try:
+        for name in SNAPSHOT_ARRAYS:
+            offset, size = header["arrays"][name]
+            offset += start
+            if offset + size > len(buffer):
+                return False
+            arrays[name] = view[offset:offset + size].cast("i")
+        for name in SNAPSHOT_STRINGS:
+            offset, size, count = header["strings"][name]
+            offset += start
+            data = buffer[offset:offset + size].decode("utf-8")
+            columns[name] = data.split("\0") if count else []
+            if len(columns[name]) != count:
+                return False
+    except (KeyError, TypeError, ValueError):
+        return False
+
+    reset_data()
+    for name in SNAPSHOT_STRINGS:
+        globals()[name].extend(columns[name])
+    loaded_sources.update(header["sources"])
+    person_offsets = arrays["person_offsets"]
+    person_movies = arrays["person_movies"]
+    movie_offsets = arrays["movie_offsets"]
+    movie_stars = arrays["movie_stars"]
+    person_index.update(zip(person_ids, range(len(person_ids))))
+    movie_index.update(zip(movie_ids, range(len(movie_ids))))
+    for person_id, name in zip(person_ids, person_names):
+        names.setdefault(normalize_name(name), []).append(person_id)
+    return True
 
 
 def main():
@@ -70,7 +527,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = bidirectional_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -79,25 +536,27 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_names[person_index[path[i][1]]]
+            person2 = person_names[person_index[path[i + 1][1]]]
+            movie = movie_titles[movie_index[path[i + 1][0]]]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def build_goal_path(goal):
+def trace_path(parents, person):
     """
-    Returns the traced path from a source node to a goal node
-    as a list of (movie_id, person_id) pairs.
+    Returns the traced path from the search root to a person index
+    as a list of (movie_id, person_id) pairs, following a map of
+    person -> (parent person, movie) indices.
     """
     path = []
-    current = goal
-    while current.parent:
-        path.append((current.action, current.state))
-        current = current.parent
+    while parents[person] is not None:
+        parent, movie = parents[person]
+        path.append((movie_ids[movie], person_ids[person]))
+        person = parent
     path.reverse()
     return path
 
+
 def shortest_path(source, target):
     """
     Returns the shortest list of (movie_id, person_id) pairs
@@ -105,43 +564,482 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
-    queue = QueueFrontier()
+    source = person_index[source]
+    target = person_index[target]
+    if source == target:
+        return []
 
-    start_node = Node(source, None, None)
-    queue.add(start_node)
+    # Maps every visited person -> (parent person, movie) indices
+    parents = {source: None}
+    frontier = deque([source])
 
-    while not queue.empty():
-        current = queue.remove()
+    while frontier:
+        current = frontier.popleft()
+        for movie in movies_for(current):
+            for neighbor in stars_for(movie):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (current, movie)
+                if neighbor == target:
+                    return trace_path(parents, target)
+                frontier.append(neighbor)
+    # No path found
+    return None
 
-        if current.state == target:
-            return build_goal_path(current)
-        
-        neighbors = neighbors_for_person(current.state)
-        for neighbor in neighbors:
-            neighbor_action, neighbor_state = neighbor
-            neighbor_node = Node(neighbor_state, current, neighbor_action)
 
-            if neighbor_state == target:
-                return build_goal_path(neighbor_node)
-            queue.frontier.append(neighbor_node)
-    # No path found
+def bfs_tree(source, targets=None):
+    """
+    Runs a BFS from a source person index and returns its map of
+    person -> (parent person, movie) indices.
+
+    If a set of target indices is given, the search stops as soon as
+    all of them have been reached.
+    """
+    parents = {source: None}
+    remaining = set(targets) - {source} if targets is not None else None
+    if remaining is not None and not remaining:
+        return parents
+    frontier = deque([source])
+
+    while frontier:
+        current = frontier.popleft()
+        for movie in movies_for(current):
+            for neighbor in stars_for(movie):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (current, movie)
+                frontier.append(neighbor)
+                if remaining is not None and neighbor in remaining:
+                    remaining.discard(neighbor)
+                    if not remaining:
+                        return parents
+    return parents
+
+
+def batch_paths(pairs, window=BATCH_WINDOW):
+    """
+    Answers many (source, target) person_id pairs, yielding
+    (source, target, path) tuples where path is as in shortest_path.
+
+    Pairs are read window at a time (or all at once if window is None)
+    and grouped by source, so that every source in a window only needs
+    one BFS tree, no matter how many targets it is queried with; a
+    source with a single target uses the bidirectional search instead.
+    Results stream out window by window, each one source group at a
+    time, not in input order.
+    """
+    pairs = iter(pairs)
+    while True:
+        groups = {}
+        for source, target in itertools.islice(pairs, window):
+            groups.setdefault(source, []).append(target)
+        if not groups:
+            return
+
+        for source, targets in groups.items():
+            if len(targets) == 1:
+                yield source, targets[0], bidirectional_path(source, targets[0])
+                continue
+            tree = bfs_tree(
+                person_index[source],
+                {person_index[target] for target in targets}
+            )
+            for target in targets:
+                target_index = person_index[target]
+                path = trace_path(tree, target_index) if target_index in tree else None
+                yield source, target, path
+
+
+def all_pairs(person_ids):
+    """
+    Yields (source, target, path) tuples for every ordered pair of
+    distinct person_ids, sharing one BFS tree per source.
+    """
+    # The pairs come source by source, so a window holds exactly one
+    return batch_paths((
+        (source, target)
+        for source in person_ids
+        for target in person_ids
+        if source != target
+    ), window=max(len(person_ids) - 1, 1))
+
+
+def bidirectional_path(source, target, deadline=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching from both
+    ends at once and always expanding the smaller frontier.
+
+    If no possible path, returns None. If a deadline (in time.monotonic()
+    seconds) is given, raises TimeoutError once it has passed.
+    """
+    source = person_index[source]
+    target = person_index[target]
+    if source == target:
+        return []
+
+    # Maps person -> (parent person, movie) indices for each side
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+    forward_depth = backward_depth = 0
+    upper = forward_bound = backward_bound = None
+
+    while forward_frontier and backward_frontier:
+        # Landmarks cost more than the first layers of a search, so they
+        # are only consulted once LANDMARK_DEPTH layers have not met. They
+        # can rule out a connection or pin down the distance exactly
+        if landmarks and forward_depth + backward_depth == LANDMARK_DEPTH:
+            lower, upper, landmark = landmark_bounds(source, target)
+            if lower == math.inf:
+                return None
+            if lower == upper:
+                return landmark_path(landmark, source, target)
+            if upper is not None and LANDMARK_PRUNING:
+                rows = separating_rows(source, target)
+                forward_bound = lower_bound_to(rows, target)
+                backward_bound = lower_bound_to(rows, source)
+            else:
+                upper = None
+
+        # With pruning, the upper bound comes with a path, so the search
+        # only looks for shorter ones and stops once the depths rule them out
+        if upper is not None and forward_depth + backward_depth + 1 >= upper:
+            break
+        if len(forward_frontier) <= len(backward_frontier):
+            budget = None if upper is None else upper - 1 - forward_depth
+            forward_depth += 1
+            forward_frontier, meeting = expand_layer(
+                forward_frontier, forward, backward, deadline,
+                forward_bound, budget
+            )
+        else:
+            budget = None if upper is None else upper - 1 - backward_depth
+            backward_depth += 1
+            backward_frontier, meeting = expand_layer(
+                backward_frontier, backward, forward, deadline,
+                backward_bound, budget
+            )
+        if meeting is not None:
+            return join_paths(forward, backward, meeting)
+
+    # No path shorter than the landmark one
+    if upper is not None:
+        return landmark_path(landmark, source, target)
     return None
 
 
-def person_id_for_name(name):
+def expand_layer(frontier, parents, other_parents, deadline=None,
+                 bound=None, budget=None):
+    """
+    Expands one full BFS layer of a bidirectional search.
+
+    Returns the next frontier and the first person that was already
+    reached by the other side (or None if the searches did not meet).
+    Since both searches only ever hold complete layers, the first
+    meeting is always on a shortest path.
+
+    Given a bound function (see lower_bound_to), people whose lower bound
+    on the distance to the other end exceeds budget are not expanded, as
+    no path of at most that many more steps goes through them.
+    """
+    next_frontier = []
+    for person in frontier:
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError("search deadline exceeded")
+        if bound is not None and bound(person) > budget:
+            continue
+        for movie in movies_for(person):
+            for neighbor in stars_for(movie):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (person, movie)
+                if neighbor in other_parents:
+                    return next_frontier, neighbor
+                next_frontier.append(neighbor)
+    return next_frontier, None
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Joins the forward and backward parent maps of a bidirectional
+    search at the meeting person into a list of (movie_id, person_id) pairs.
+    """
+    path = trace_path(forward, meeting)
+    current = meeting
+    while backward[current] is not None:
+        child, movie = backward[current]
+        path.append((movie_ids[movie], person_ids[child]))
+        current = child
+    return path
+
+
+def load_landmarks(directory, count=LANDMARKS):
+    """
+    Loads the landmark distances of a directory, computing them with
+    build_landmarks (and saving them) if they are missing or stale.
+    """
+    if not read_landmarks(directory, count):
+        build_landmarks(count)
+        try:
+            save_landmarks(directory)
+        except OSError:
+            pass
+
+
+def build_landmarks(count=LANDMARKS):
+    """
+    Picks the count people who starred in the most movies as landmarks
+    and stores the BFS distance from each of them to every person.
+    """
+    landmarks.clear()
+    landmark_distances.clear()
+    by_movies = sorted(
+        range(len(person_ids)),
+        key=lambda person: -len(movies_for(person))
+    )
+    for landmark in by_movies[:count]:
+        landmarks.append(landmark)
+        landmark_distances.append(bfs_distances(landmark))
+
+
+def bfs_distances(source):
+    """
+    Returns a uint8 array of the BFS distance from a source person index
+    to every person index, capped at MAX_DISTANCE, or UNREACHABLE.
+    """
+    distances = array("B", [UNREACHABLE]) * len(person_ids)
+    distances[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth = min(depth + 1, MAX_DISTANCE)
+        next_frontier = []
+        for person in frontier:
+            for movie in movies_for(person):
+                for neighbor in stars_for(movie):
+                    if distances[neighbor] == UNREACHABLE:
+                        distances[neighbor] = depth
+                        next_frontier.append(neighbor)
+        frontier = next_frontier
+    return distances
+
+
+def writable_landmark_row(slot):
+    """
+    Returns the distance row of a landmark as a growable array, copying
+    it out of the read-only mapped file first if needed.
+    """
+    if not isinstance(landmark_distances[slot], array):
+        landmark_distances[slot] = array("B", landmark_distances[slot])
+    return landmark_distances[slot]
+
+
+def relax_landmarks(seeds):
+    """
+    Lowers the landmark distances that new edges between the seed
+    person indices have shortened, spreading out only from people
+    whose distance actually changed.
+    """
+    for slot in range(len(landmarks)):
+        distances = writable_landmark_row(slot)
+        frontier = deque(seeds)
+        while frontier:
+            person = frontier.popleft()
+            if distances[person] >= MAX_DISTANCE:
+                continue
+            closer = distances[person] + 1
+            for movie in movies_for(person):
+                for neighbor in stars_for(movie):
+                    if distances[neighbor] > closer:
+                        distances[neighbor] = closer
+                        frontier.append(neighbor)
+
+
+def save_landmarks(directory):
+    """
+    Writes the landmark distances to a file in the directory: a JSON
+    header line followed by one uint8 distance row per landmark.
+    """
+    header = {
+        "sources": loaded_sources,
+        "people": len(person_ids),
+        "landmarks": [person_ids[landmark] for landmark in landmarks]
+    }
+    path = os.path.join(directory, LANDMARKS_NAME)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(json.dumps(header).encode("utf-8") + b"\n")
+        for distances in landmark_distances:
+            f.write(distances)
+    os.replace(temporary, path)
+
+
+def read_landmarks(directory, count=LANDMARKS):
+    """
+    Maps the landmark distances of a directory into memory.
+
+    Returns False if there are none, they are stale or fewer than count.
+    """
+    path = os.path.join(directory, LANDMARKS_NAME)
+    try:
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            start = f.tell()
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if (header["sources"] != loaded_sources
+                or header["people"] != len(person_ids)
+                or len(header["landmarks"]) < count):
+            return False
+        selected = [person_index[person_id] for person_id in header["landmarks"]]
+    except (OSError, ValueError, KeyError):
+        return False
+
+    size = len(person_ids)
+    if len(buffer) < start + size * len(selected):
+        return False
+    view = memoryview(buffer)
+    landmarks.clear()
+    landmark_distances.clear()
+    for i, landmark in enumerate(selected[:count]):
+        landmarks.append(landmark)
+        landmark_distances.append(view[start + i * size:start + (i + 1) * size])
+    return True
+
+
+def landmark_bounds(source, target):
+    """
+    Returns (lower, upper, landmark) bounds on the distance between two
+    person indices from the triangle inequality over all landmarks, where
+    landmark is the slot that gives the upper bound.
+
+    lower is math.inf if some landmark reaches exactly one of them, and
+    upper is None if no landmark reaches both.
+    """
+    lower, upper, best = 0, None, None
+    for slot, distances in enumerate(landmark_distances):
+        a = distances[source]
+        b = distances[target]
+        if a == UNREACHABLE and b == UNREACHABLE:
+            continue
+        if a == UNREACHABLE or b == UNREACHABLE:
+            return math.inf, None, None
+        if a == MAX_DISTANCE or b == MAX_DISTANCE:
+            continue
+        lower = max(lower, abs(a - b))
+        if upper is None or a + b < upper:
+            upper, best = a + b, slot
+    return lower, upper, best
+
+
+def separating_rows(source, target):
+    """
+    Returns the distance rows of the ACTIVE_LANDMARKS landmarks that
+    give the largest lower bounds on the distance of two person indices.
+    """
+    rows = [row for row in landmark_distances
+            if row[source] < MAX_DISTANCE and row[target] < MAX_DISTANCE]
+    rows.sort(key=lambda row: abs(row[source] - row[target]), reverse=True)
+    return rows[:ACTIVE_LANDMARKS]
+
+
+def lower_bound_to(rows, person):
+    """
+    Returns a function that gives a lower bound on the distance from any
+    person index to person, from the landmark distance rows.
+    """
+    pairs = [(row, row[person]) for row in rows]
+
+    def bound(index):
+        best = 0
+        for row, distance in pairs:
+            difference = abs(row[index] - distance)
+            if difference > best:
+                best = difference
+        return best
+    return bound
+
+
+def distance_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two person_ids from the landmarks, without any search. lower is
+    math.inf if they are not connected, and upper is None if no landmark
+    gives one (or no landmarks are loaded).
+    """
+    if source == target:
+        return 0, 0
+    lower, upper, _ = landmark_bounds(person_index[source], person_index[target])
+    return max(lower, 1), upper
+
+
+def landmark_path(slot, source, target):
+    """
+    Returns the list of (movie_id, person_id) pairs from source through
+    a landmark to target, found by walking down its distance row from
+    both ends without any search.
+    """
+    distances = landmark_distances[slot]
+    path = [(movie_ids[movie], person_ids[person])
+            for movie, person in descend(distances, source)]
+    steps = descend(distances, target)
+    people = [target] + [person for _, person in steps]
+    for i in range(len(steps) - 1, -1, -1):
+        path.append((movie_ids[steps[i][0]], person_ids[people[i]]))
+    return path
+
+
+def descend(distances, person):
+    """
+    Returns the (movie, person) index steps from a person to the
+    landmark of a distance row, always moving one step closer.
+    """
+    steps = []
+    while distances[person] != 0:
+        closer = distances[person] - 1
+        step = next(
+            (movie, neighbor)
+            for movie in movies_for(person)
+            for neighbor in stars_for(movie)
+            if distances[neighbor] == closer
+        )
+        steps.append(step)
+        person = step[1]
+    return steps
+
+
+def degrees_of_separation(source, target, deadline=None):
+    """
+    Returns the number of degrees of separation between two person_ids,
+    or None if they are not connected.
+
+    Found by bidirectional_path, so queries whose landmark bounds agree
+    (or prove the people disconnected) stop searching once its first
+    layers have not met. distance_bounds gives the bounds without any
+    search at all.
+    """
+    path = bidirectional_path(source, target, deadline)
+    return None if path is None else len(path)
+
+
+def person_id_for_name(name, interactive=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If interactive is False, ambiguities are resolved without asking
+    by picking the person who starred in the most movies.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = rank_people(names.get(normalize_name(name), ()))
     if len(person_ids) == 0:
         return None
-    elif len(person_ids) > 1:
+    elif len(person_ids) > 1 and interactive:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            person = person_index[person_id]
+            name = person_names[person]
+            birth = person_births[person]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -154,18 +1052,146 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def resolve_person(query, max_distance=1):
+    """
+    Returns the person_id for a query that is either a person_id or a
+    name, without prompting: exact names are disambiguated by number
+    of movies, and unknown names fall back to the best fuzzy match
+    within max_distance edits.
+
+    Returns None if nothing matches.
+    """
+    if query in person_index:
+        return query
+    person_id = person_id_for_name(query, interactive=False)
+    if person_id is None:
+        matches = people_for_fuzzy_name(query, max_distance, limit=1)
+        if matches:
+            person_id = matches[0]
+    return person_id
+
+
+def normalize_name(name):
+    """
+    Returns the form names are indexed under: accents stripped,
+    case folded and whitespace collapsed.
+    """
+    if not name.isascii():
+        decomposed = unicodedata.normalize("NFKD", name)
+        name = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(name.casefold().split())
+
+
+def name_index():
+    """
+    Returns the sorted list of normalized names, building it on first use.
+    """
+    global sorted_names
+    if sorted_names is None:
+        sorted_names = sorted(names)
+    return sorted_names
+
+
+def movie_count(person_id):
+    """
+    Returns the number of movies a person starred in.
+    """
+    return len(movies_for(person_index[person_id]))
+
+
+def rank_people(person_ids):
+    """
+    Returns person_ids ordered by number of movies, most first.
+    """
+    return sorted(person_ids, key=lambda person_id: (-movie_count(person_id), person_id))
+
+
+def people_for_prefix(prefix, limit=None):
+    """
+    Returns the person_ids of all people whose normalized name starts
+    with the prefix, ranked by number of movies.
+    """
+    index = name_index()
+    prefix = normalize_name(prefix)
+    start = bisect.bisect_left(index, prefix)
+    end = bisect.bisect_left(index, prefix + "\U0010ffff", start)
+    person_ids = rank_people(
+        person_id for name in index[start:end] for person_id in names[name]
+    )
+    return person_ids[:limit]
+
+
+def people_for_fuzzy_name(name, max_distance=2, limit=None):
+    """
+    Returns the person_ids of all people whose normalized name is within
+    max_distance edits (Levenshtein distance) of the given name, ranked
+    by distance and then by number of movies.
+
+    The sorted name index is walked like a trie: edit distance rows are
+    reused for the prefix shared with the previous name, and as soon as
+    every entry of a row exceeds max_distance, all names with that
+    prefix are skipped with a single bisect.
+    """
+    index = name_index()
+    query = normalize_name(name)
+    matches = []
+
+    # rows[d] is the edit distance row after the first d characters of prefix
+    rows = [list(range(len(query) + 1))]
+    prefix = ""
+    i = 0
+    while i < len(index):
+        candidate = index[i]
+        common = 0
+        while (common < len(prefix) and common < len(candidate)
+               and prefix[common] == candidate[common]):
+            common += 1
+        del rows[common + 1:]
+        prefix = candidate[:common]
+
+        for c in candidate[common:]:
+            row = next_distance_row(rows[-1], query, c)
+            rows.append(row)
+            prefix += c
+            if min(row) > max_distance:
+                i = bisect.bisect_left(index, prefix + "\U0010ffff", i)
+                break
+        else:
+            if rows[-1][-1] <= max_distance:
+                matches.append((rows[-1][-1], candidate))
+            i += 1
+
+    ranked = sorted(
+        (distance, -movie_count(person_id), person_id)
+        for distance, candidate in matches
+        for person_id in names[candidate]
+    )
+    return [person_id for _, _, person_id in ranked][:limit]
+
+
+def next_distance_row(row, query, c):
+    """
+    Returns the edit distance row for a prefix extended by character c,
+    given the row of the prefix.
+    """
+    next_row = [row[0] + 1]
+    for j, q in enumerate(query):
+        next_row.append(min(next_row[j] + 1, row[j + 1] + 1, row[j] + (q != c)))
+    return next_row
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
+    person = person_index[person_id]
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for movie in movies_for(person):
+        for neighbor in stars_for(movie):
+            neighbors.add((movie_ids[movie], person_ids[neighbor]))
     return neighbors
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
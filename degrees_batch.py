@@ -0,0 +1,100 @@
+import json
+import sys
+
+import degrees
+
+
+def read_pairs(lines):
+    """
+    Parses (source, target, error) triples from lines that are either
+    JSON objects with "source" and "target" keys (person_ids or names),
+    or two whitespace separated person_ids. Blank lines are skipped.
+
+    A line that cannot be parsed gives a triple with source and target
+    None and an error message naming the line, so that one bad line does
+    not stop the rest of the batch.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                query = json.loads(line)
+            except ValueError as e:
+                error = f"invalid JSON: {e}"
+            else:
+                people = [query.get("source"), query.get("target")]
+                if None in people:
+                    error = 'JSON queries need "source" and "target" keys'
+                elif not all(isinstance(person, (str, int)) and not isinstance(person, bool)
+                             for person in people):
+                    error = "source and target must be person_ids or names"
+                else:
+                    yield str(people[0]), str(people[1]), None
+                    continue
+        else:
+            fields = line.split()
+            if len(fields) == 2:
+                yield fields[0], fields[1], None
+                continue
+            error = "expected two person_ids or a JSON object"
+        yield None, None, f"line {number}: {error}"
+
+
+def write_results(pairs, out):
+    """
+    Answers all (source, target, error) triples from read_pairs and
+    writes one JSON line per result to out. Sources and targets may be
+    person_ids or names; lines that could not be parsed and pairs that
+    cannot be resolved are reported with an error instead.
+
+    Results are written as each window of degrees.BATCH_WINDOW pairs is
+    answered (see degrees.batch_paths), so output starts before the whole
+    input is read, and errors may come ahead of earlier pairs' results.
+    """
+    def resolved(pairs):
+        for source, target, error in pairs:
+            if error is not None:
+                write_line(out, {"source": source, "target": target, "error": error})
+                continue
+            person_ids = [degrees.resolve_person(query) for query in (source, target)]
+            if None in person_ids:
+                unknown = (source, target)[person_ids.index(None)]
+                write_line(out, {
+                    "source": source,
+                    "target": target,
+                    "error": f"unknown person {unknown}"
+                })
+            else:
+                yield tuple(person_ids)
+
+    for source, target, path in degrees.batch_paths(resolved(pairs)):
+        write_line(out, {
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "path": path
+        })
+
+
+def write_line(out, result):
+    out.write(json.dumps(result) + "\n")
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python degrees_batch.py directory [queries]")
+    directory = sys.argv[1]
+
+    degrees.load_data(directory)
+
+    if len(sys.argv) == 3:
+        with open(sys.argv[2], encoding="utf-8") as f:
+            write_results(read_pairs(f), sys.stdout)
+    else:
+        write_results(read_pairs(sys.stdin), sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+import degrees
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Synthetic dataset sizes: people, movies, mean stars per movie and the
+# Zipf exponent of actor popularity (0 means every actor is equally likely)
+SIZES = {
+    "small": (2_000, 1_000, 4, 0.8),
+    "large": (200_000, 80_000, 5, 0.8)
+}
+
+# Queries per path length, the path lengths to benchmark, and how many
+# targets to draw from each BFS when building the query set
+QUERIES = 50
+PATH_LENGTHS = [1, 2, 3, 4, 5, 6]
+TARGETS_PER_SOURCE = 5
+
+SEED = 0
+
+
+def generate(directory, people, movies, stars, skew, seed=SEED):
+    """
+    Writes a synthetic people.csv, movies.csv and stars.csv to directory.
+    Each movie gets 1 to 2 * stars - 1 distinct stars, drawn with Zipf
+    weights so a few actors appear in many movies, like in IMDb.
+    """
+    rng = random.Random(seed)
+    with open(os.path.join(directory, "people.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(people):
+            writer.writerow([i + 1, f"Person {i}", 1900 + rng.randrange(120)])
+
+    with open(os.path.join(directory, "movies.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(movies):
+            writer.writerow([i + 1, f"Movie {i}", 1920 + rng.randrange(100)])
+
+    weights = []
+    total = 0.0
+    for i in range(people):
+        total += 1 / (i + 1) ** skew
+        weights.append(total)
+    with open(os.path.join(directory, "stars.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(movies):
+            count = rng.randint(1, 2 * stars - 1)
+            cast = set(rng.choices(range(people), cum_weights=weights, k=count))
+            for person in cast:
+                writer.writerow([person + 1, movie + 1])
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in MiB, if known.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB everywhere else
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def timed(function, *args):
+    """
+    Returns (seconds, result) of calling function with args.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def query_set(rng):
+    """
+    Returns {length: [(source, target), ...]} with up to QUERIES pairs of
+    person_ids at exactly each of PATH_LENGTHS degrees of separation.
+    """
+    queries = {length: [] for length in PATH_LENGTHS}
+    candidates = [person for person in range(len(degrees.person_ids))
+                  if len(degrees.movies_for(person))]
+    for _ in range(10 * QUERIES):
+        if all(len(pairs) >= QUERIES for pairs in queries.values()):
+            break
+        source = rng.choice(candidates)
+        distances = degrees.bfs_distances(source)
+        by_length = {}
+        for person, distance in enumerate(distances):
+            if distance in queries:
+                by_length.setdefault(distance, []).append(person)
+        for length, people in by_length.items():
+            wanted = min(QUERIES - len(queries[length]), TARGETS_PER_SOURCE, len(people))
+            for target in rng.sample(people, max(wanted, 0)):
+                queries[length].append(
+                    (degrees.person_ids[source], degrees.person_ids[target])
+                )
+    return queries
+
+
+def count_expansions(search, pairs):
+    """
+    Returns the mean number of people whose movies a search expanded per
+    query, counted by wrapping degrees.movies_for (outside of any timing).
+    """
+    movies_for = degrees.movies_for
+    count = 0
+
+    def counting_movies_for(person):
+        nonlocal count
+        count += 1
+        return movies_for(person)
+
+    degrees.movies_for = counting_movies_for
+    try:
+        for source, target in pairs:
+            search(source, target)
+    finally:
+        degrees.movies_for = movies_for
+    return count / len(pairs)
+
+
+def percentiles(latencies):
+    """
+    Returns the p50, p90, p99 and max of a list of latencies in ms.
+    """
+    latencies = sorted(latencies)
+    return [
+        1000 * latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+        for q in (0.5, 0.9, 0.99)
+    ] + [1000 * latencies[-1]]
+
+
+def benchmark_searches(searches, queries):
+    """
+    Prints expansions and latency percentiles of every (name, search)
+    pair for each path length of the query set.
+    """
+    for name, search in searches:
+        for length, pairs in queries.items():
+            if not pairs:
+                continue
+            latencies = [timed(search, source, target)[0] for source, target in pairs]
+            expanded = count_expansions(search, pairs)
+            print(f"  {name:<24}{length:>4}{len(pairs):>5}{expanded:>10.0f}"
+                  + "".join(f"{value:>10.3f}" for value in percentiles(latencies)))
+
+
+def benchmark_neighbors(rng):
+    """
+    Prints latency percentiles of neighbors_for_person on random people.
+    """
+    sample = [rng.choice(degrees.person_ids) for _ in range(1000)]
+    latencies = [timed(degrees.neighbors_for_person, person_id)[0]
+                 for person_id in sample]
+    print(f"  {'neighbors_for_person':<24}{'':>4}{len(sample):>5}{'':>10}"
+          + "".join(f"{value:>10.3f}" for value in percentiles(latencies)))
+
+
+def benchmark(size):
+    """
+    Generates a dataset of the given size and runs every benchmark on it.
+    """
+    people, movies, stars, skew = SIZES[size]
+    print(f"{size}: {people} people, {movies} movies, "
+          f"{stars} stars per movie, skew {skew}")
+    rng = random.Random(SEED)
+    with tempfile.TemporaryDirectory() as directory:
+        seconds, _ = timed(generate, directory, people, movies, stars, skew)
+        print(f"  generated in {seconds:.2f}s")
+
+        report("load_data (CSV + snapshot write)", degrees.load_data, directory)
+        report("load_data (snapshot)", degrees.load_data, directory)
+        queries = query_set(rng)
+
+        print(f"  {'search':<24}{'len':>4}{'n':>5}{'expanded':>10}"
+              f"{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        benchmark_neighbors(rng)
+        benchmark_searches([
+            ("shortest_path", degrees.shortest_path),
+            ("bidirectional_path", degrees.bidirectional_path)
+        ], queries)
+
+        report("load_landmarks (build)", degrees.load_landmarks, directory)
+        benchmark_searches([
+            ("bidirectional+landmarks", degrees.bidirectional_path),
+            ("bidirectional+pruning", pruned_path),
+            ("degrees_of_separation", degrees.degrees_of_separation)
+        ], queries)
+        degrees.reset_data()
+
+
+def pruned_path(source, target):
+    """
+    Returns bidirectional_path with degrees.LANDMARK_PRUNING switched on.
+    """
+    degrees.LANDMARK_PRUNING = True
+    try:
+        return degrees.bidirectional_path(source, target)
+    finally:
+        degrees.LANDMARK_PRUNING = False
+
+
+def report(name, function, *args):
+    """
+    Prints the wall time of a loading step and the peak RSS after it.
+    """
+    seconds, _ = timed(function, *args)
+    rss = peak_rss()
+    rss = "unknown" if rss is None else f"{rss:.0f} MiB"
+    print(f"  {name}: {seconds:.3f}s, peak RSS {rss}")
+
+
+def main():
+    if len(sys.argv) > 2 or (len(sys.argv) == 2 and sys.argv[1] not in SIZES):
+        sys.exit(f"Usage: python degrees_bench.py [{'|'.join(SIZES)}]")
+    sizes = [sys.argv[1]] if len(sys.argv) == 2 else list(SIZES)
+    for size in sizes:
+        benchmark(size)
+
+
+if __name__ == "__main__":
+    main()
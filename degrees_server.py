@@ -0,0 +1,217 @@
+import json
+import multiprocessing
+import os
+import socketserver
+import sys
+import threading
+import time
+
+import degrees
+
+# Seconds a single query may search before it is answered with an error
+TIMEOUT = 5.0
+
+# Seconds between checks for rows appended to the CSV files
+REFRESH_INTERVAL = 10.0
+
+# Data directory and time of the last refresh, per worker process
+worker_directory = None
+last_refresh = 0.0
+
+
+def load_worker(directory, landmarks):
+    """
+    Pool initializer: forked workers already share the parent's graph
+    copy-on-write, spawned workers open it from the (mmap'd) snapshot.
+    """
+    global worker_directory, last_refresh
+    worker_directory = directory
+    last_refresh = time.monotonic()
+    if not degrees.person_ids:
+        degrees.load_data(directory)
+        if landmarks:
+            degrees.read_landmarks(directory)
+
+
+def refresh_worker():
+    """
+    Ingests rows appended to the CSV files into this worker's graph,
+    at most once every REFRESH_INTERVAL seconds.
+    """
+    global last_refresh
+    if time.monotonic() - last_refresh < REFRESH_INTERVAL:
+        return
+    last_refresh = time.monotonic()
+    degrees.refresh_data(worker_directory)
+
+
+def refresh_snapshot(directory, stop):
+    """
+    Keeps the on-disk snapshot up to date with appended CSV rows, so
+    restarts and spawned workers start from fresh data.
+    """
+    while not stop.wait(REFRESH_INTERVAL):
+        degrees.refresh_data(directory, save=True)
+
+
+def answer(query, timeout):
+    """
+    Answers one query object with "source" and "target" (person_ids
+    or names) inside a worker process, echoing its "id" if present.
+    With "distance_only" set, only the degrees are computed, which the
+    landmark bounds can often answer without any search.
+    """
+    refresh_worker()
+    response = {"id": query.get("id")}
+    try:
+        source = query["source"]
+        target = query["target"]
+    except KeyError as e:
+        response["error"] = f"missing field {e}"
+        return response
+    response["source"] = source
+    response["target"] = target
+
+    person_ids = [degrees.resolve_person(person) for person in (source, target)]
+    if None in person_ids:
+        unknown = (source, target)[person_ids.index(None)]
+        response["error"] = f"unknown person {unknown}"
+        return response
+    source, target = person_ids
+
+    response["source_id"] = source
+    response["target_id"] = target
+
+    deadline = time.monotonic() + timeout if timeout else None
+    try:
+        if query.get("distance_only"):
+            response["degrees"] = degrees.degrees_of_separation(
+                source, target, deadline
+            )
+            return response
+        path = degrees.bidirectional_path(source, target, deadline)
+    except TimeoutError:
+        response["error"] = "timed out"
+        return response
+    response["degrees"] = None if path is None else len(path)
+    response["path"] = path
+    return response
+
+
+def serve_lines(pool, lines, write, timeout=TIMEOUT):
+    """
+    Dispatches every JSON line to the pool and writes each response as
+    soon as it is ready, so responses may arrive out of order (match
+    them by "id"). Returns once all responses have been written.
+    """
+    pending = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            query = json.loads(line)
+            if not isinstance(query, dict):
+                raise ValueError("query must be a JSON object")
+        except ValueError as e:
+            write({"id": None, "error": f"invalid query: {e}"})
+            continue
+        pending.append(pool.apply_async(
+            answer, (query, timeout),
+            callback=write,
+            error_callback=lambda e, query=query: write(
+                {"id": query.get("id"), "error": str(e)}
+            )
+        ))
+    for result in pending:
+        result.wait()
+
+
+def line_writer(stream):
+    """
+    Returns a thread-safe function writing one JSON line to a text stream.
+    """
+    lock = threading.Lock()
+
+    def write(response):
+        with lock:
+            stream.write(json.dumps(response) + "\n")
+            stream.flush()
+    return write
+
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    """
+    Speaks the JSON lines protocol over one socket connection.
+    """
+
+    def handle(self):
+        lock = threading.Lock()
+        closed = threading.Event()
+
+        def write(response):
+            # Runs as a pool callback, which must never raise: that would
+            # kill the pool's result thread and stall every connection
+            with lock:
+                if closed.is_set():
+                    return
+                try:
+                    self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+                except OSError:
+                    closed.set()
+
+        def lines():
+            # Stop dispatching once the client is gone
+            try:
+                for line in self.rfile:
+                    if closed.is_set():
+                        return
+                    yield line.decode("utf-8")
+            except OSError:
+                closed.set()
+
+        serve_lines(self.server.pool, lines(), write, self.server.query_timeout)
+
+
+def main():
+    # Landmarks take a BFS per landmark to build and do not speed up
+    # searches on every graph, so they are only loaded when asked for
+    landmarks = "--landmarks" in sys.argv[1:2]
+    args = sys.argv[2:] if landmarks else sys.argv[1:]
+    if len(args) not in [1, 2]:
+        sys.exit("Usage: python degrees_server.py [--landmarks] directory [socket]")
+    directory = args[0]
+
+    # Load the graph once, before forking, so workers inherit it
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(directory)
+    if landmarks:
+        degrees.load_landmarks(directory)
+    print("Data loaded.", file=sys.stderr)
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    stop = threading.Event()
+    with context.Pool(os.cpu_count(), load_worker, (directory, landmarks)) as pool:
+        threading.Thread(
+            target=refresh_snapshot, args=(directory, stop), daemon=True
+        ).start()
+        if len(args) == 2:
+            # Remove a socket file left behind by a killed server
+            if os.path.exists(args[1]):
+                os.unlink(args[1])
+            with socketserver.ThreadingUnixStreamServer(args[1], QueryHandler) as server:
+                server.pool = pool
+                server.query_timeout = TIMEOUT
+                print(f"Listening on {args[1]}", file=sys.stderr)
+                try:
+                    server.serve_forever()
+                finally:
+                    os.unlink(args[1])
+        else:
+            serve_lines(pool, sys.stdin, line_writer(sys.stdout))
+        stop.set()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,50 @@
 import itertools
+import multiprocessing
+import os
+import weakref
+
+# Deepest nesting of a compiled expression before its parts are assigned
+# to temporaries, see assign()
+NESTING = 32
+
+# Compiled functions kept per sentence, for different symbol lists
+COMPILED = 8
+
+# Symbols whose models table_check evaluates at once, as bits of integers
+CHUNK_BITS = 16
+
+# Largest number of symbols for which model_check uses table_check
+TABLE_SYMBOLS = 24
+
+# Largest number of symbols that parallel_check checks in this process
+SERIAL_SYMBOLS = 20
+
+# Jobs per process of parallel_check, so that fast jobs balance slow ones
+JOBS_PER_PROCESS = 4
+
+# Compiled knowledge, query and symbol count of a parallel_check worker,
+# after the id of the CheckPool check they belong to (None otherwise)
+worker_check = None
+
+# Shared id of the last cancelled check, in CheckPool workers
+worker_cancelled = None
 
 
 class Sentence():
+    """
+    Sentences other than And are immutable and hash-consed: constructing
+    one from the same operands returns the same shared object, and its
+    hash, symbols and formula are computed once. An And may still grow
+    with add() until it is an operand of another sentence, which freezes
+    it; from then on it counts as equal operands with any And of the
+    same conjuncts.
+    """
+
+    __slots__ = ("cached_hash", "cached_symbols", "cached_formula",
+                 "cached_parenthesized", "cached_compiled", "__weakref__")
+
+    # Shared sentences by (class, operands), see intern()
+    interned = weakref.WeakValueDictionary()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,13 +56,82 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    def symbol_set(self):
+        """Returns the cached set of symbols, which must not be modified."""
+        return frozenset()
+
+    def parenthesized(self):
+        """Returns the formula parenthesized if not already parenthesized."""
+        if self.cached_parenthesized is None:
+            self.cached_parenthesized = Sentence.parenthesize(self.formula())
+        return self.cached_parenthesized
+
+    def operands(self):
+        """Returns the sentences that the logical sentence is made of."""
+        return ()
+
+    def expression(self, operands, indices):
+        """
+        Returns a Python expression for the logical sentence in a model `m`,
+        an integer whose bit indices[name] is the value of each symbol,
+        given Python expressions for the values of its operands.
+        """
+        raise Exception("nothing to compile")
+
+    def columns(self, operands, indices):
+        """
+        Returns a Python expression for the truth values of the logical
+        sentence in many models at once: bit k of the integer c[i] is the
+        value of the symbol with indices[name] == i in model k, and `ones`
+        has a bit set for every model. operands are Python expressions for
+        the truth values of its operands.
+        """
+        raise Exception("nothing to compile")
 
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
             raise TypeError("must be a logical sentence")
 
+    @classmethod
+    def identify(cls, operand):
+        """
+        Returns what identifies an operand in the key of a shared sentence:
+        its id, or for an And, which this freezes, the identities of its
+        conjuncts.
+        """
+        if not isinstance(operand, And):
+            return id(operand)
+        if operand.cached_key is None:
+            operand.frozen = True
+            operand.cached_key = ("and",) + tuple(
+                Sentence.identify(conjunct) for conjunct in operand.conjuncts
+            )
+        return operand.cached_key
+
+    @classmethod
+    def intern(cls, key, operands):
+        """
+        Returns the shared sentence of this class with the given operands,
+        creating it if there is none; key identifies the operands.
+        Returns whether it already existed, too.
+        """
+        key = (cls, key)
+        sentence = Sentence.interned.get(key)
+        if sentence is not None:
+            return sentence, True
+        sentence = object.__new__(cls)
+        sentence.cached_symbols = frozenset().union(
+            *[operand.symbol_set() for operand in operands]
+        )
+        sentence.cached_formula = None
+        sentence.cached_parenthesized = None
+        sentence.cached_compiled = None
+        Sentence.interned[key] = sentence
+        return sentence, False
+
     @classmethod
     def parenthesize(cls, s):
         """Parenthesizes an expression if not already parenthesized."""
@@ -43,15 +155,24 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        symbol, shared = cls.intern(name, [])
+        if not shared:
+            symbol.name = name
+            symbol.cached_symbols = frozenset([name])
+            symbol.cached_hash = hash(("symbol", name))
+        return symbol
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __eq__(self, other):
         return isinstance(other, Symbol) and self.name == other.name
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self.cached_hash
 
     def __repr__(self):
         return self.name
@@ -65,20 +186,43 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def symbol_set(self):
+        return self.cached_symbols
+
+    def expression(self, operands, indices):
+        try:
+            return f"(m >> {indices[self.name]} & 1)"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def columns(self, operands, indices):
+        try:
+            return f"c[{indices[self.name]}]"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        sentence, shared = cls.intern(Sentence.identify(operand), [operand])
+        if not shared:
+            sentence.operand = operand
+            sentence.cached_hash = hash(("not", hash(operand)))
+        return sentence
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self.cached_hash
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -87,25 +231,56 @@ class Not(Sentence):
         return not self.operand.evaluate(model)
 
     def formula(self):
-        return "¬" + Sentence.parenthesize(self.operand.formula())
+        if self.cached_formula is None:
+            self.cached_formula = "¬" + self.operand.parenthesized()
+        return self.cached_formula
 
-    def symbols(self):
-        return self.operand.symbols()
+    def symbol_set(self):
+        return self.cached_symbols
+
+    def operands(self):
+        return (self.operand,)
+
+    def expression(self, operands, indices):
+        return f"(not {operands[0]})"
+
+    def columns(self, operands, indices):
+        return f"(ones ^ {operands[0]})"
 
 
 class And(Sentence):
+    __slots__ = ("conjuncts", "frozen", "cached_key")
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
+            if isinstance(conjunct, And):
+                conjunct.frozen = True
         self.conjuncts = list(conjuncts)
+        self.frozen = False
+        self.cached_key = None
+        self.cached_hash = None
+        self.cached_symbols = set().union(
+            *[conjunct.symbol_set() for conjunct in conjuncts]
+        )
+        self.cached_formula = None
+        self.cached_parenthesized = None
+        self.cached_compiled = None
+
+    def __reduce__(self):
+        return (And, tuple(self.conjuncts))
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        if self.cached_hash is None:
+            self.cached_hash = hash(
+                ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+            )
+        return self.cached_hash
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +289,73 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        if self.frozen:
+            raise Exception("cannot add to an And that is an operand")
         Sentence.validate(conjunct)
+        if isinstance(conjunct, And):
+            conjunct.frozen = True
         self.conjuncts.append(conjunct)
+        self.cached_hash = None
+        self.cached_symbols |= conjunct.symbol_set()
+        self.cached_formula = None
+        self.cached_parenthesized = None
+        self.cached_compiled = None
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
     def formula(self):
-        if len(self.conjuncts) == 1:
-            return self.conjuncts[0].formula()
-        return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
-                           for conjunct in self.conjuncts])
+        if self.cached_formula is None:
+            if len(self.conjuncts) == 1:
+                self.cached_formula = self.conjuncts[0].formula()
+            else:
+                self.cached_formula = " ∧ ".join(
+                    [conjunct.parenthesized() for conjunct in self.conjuncts]
+                )
+        return self.cached_formula
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def symbol_set(self):
+        return self.cached_symbols
+
+    def operands(self):
+        return self.conjuncts
+
+    def expression(self, operands, indices):
+        if not operands:
+            return "True"
+        return "(" + " and ".join(operands) + ")"
+
+    def columns(self, operands, indices):
+        if not operands:
+            return "ones"
+        return join_columns("&", operands)
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        key = tuple(Sentence.identify(disjunct) for disjunct in disjuncts)
+        sentence, shared = cls.intern(key, disjuncts)
+        if not shared:
+            sentence.disjuncts = disjuncts
+            sentence.cached_hash = hash(
+                ("or", tuple(hash(disjunct) for disjunct in disjuncts))
+            )
+        return sentence
+
+    def __reduce__(self):
+        return (Or, self.disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return self.cached_hash
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -152,29 +365,59 @@ class Or(Sentence):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
     def formula(self):
-        if len(self.disjuncts) == 1:
-            return self.disjuncts[0].formula()
-        return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
-                            for disjunct in self.disjuncts])
+        if self.cached_formula is None:
+            if len(self.disjuncts) == 1:
+                self.cached_formula = self.disjuncts[0].formula()
+            else:
+                self.cached_formula = " ∨  ".join(
+                    [disjunct.parenthesized() for disjunct in self.disjuncts]
+                )
+        return self.cached_formula
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def symbol_set(self):
+        return self.cached_symbols
+
+    def operands(self):
+        return self.disjuncts
+
+    def expression(self, operands, indices):
+        if not operands:
+            return "False"
+        return "(" + " or ".join(operands) + ")"
+
+    def columns(self, operands, indices):
+        if not operands:
+            return "0"
+        return join_columns("|", operands)
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        sentence, shared = cls.intern((Sentence.identify(antecedent),
+                                       Sentence.identify(consequent)),
+                                      [antecedent, consequent])
+        if not shared:
+            sentence.antecedent = antecedent
+            sentence.consequent = consequent
+            sentence.cached_hash = hash(
+                ("implies", hash(antecedent), hash(consequent))
+            )
+        return sentence
+
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (isinstance(other, Implication)
+                                 and self.antecedent == other.antecedent
+                                 and self.consequent == other.consequent)
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self.cached_hash
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -184,80 +427,406 @@ class Implication(Sentence):
                 or self.consequent.evaluate(model))
 
     def formula(self):
-        antecedent = Sentence.parenthesize(self.antecedent.formula())
-        consequent = Sentence.parenthesize(self.consequent.formula())
-        return f"{antecedent} => {consequent}"
+        if self.cached_formula is None:
+            antecedent = self.antecedent.parenthesized()
+            consequent = self.consequent.parenthesized()
+            self.cached_formula = f"{antecedent} => {consequent}"
+        return self.cached_formula
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def symbol_set(self):
+        return self.cached_symbols
+
+    def operands(self):
+        return (self.antecedent, self.consequent)
+
+    def expression(self, operands, indices):
+        antecedent, consequent = operands
+        return f"(not {antecedent} or {consequent})"
+
+    def columns(self, operands, indices):
+        antecedent, consequent = operands
+        return f"((ones ^ {antecedent}) | {consequent})"
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        sentence, shared = cls.intern(
+            (Sentence.identify(left), Sentence.identify(right)), [left, right]
+        )
+        if not shared:
+            sentence.left = left
+            sentence.right = right
+            sentence.cached_hash = hash(
+                ("biconditional", hash(left), hash(right))
+            )
+        return sentence
+
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (isinstance(other, Biconditional)
+                                 and self.left == other.left
+                                 and self.right == other.right)
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self.cached_hash
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
-        return f"{left} <=> {right}"
-
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        if self.cached_formula is None:
+            left = Sentence.parenthesize(str(self.left))
+            right = Sentence.parenthesize(str(self.right))
+            self.cached_formula = f"{left} <=> {right}"
+        return self.cached_formula
+
+    def symbol_set(self):
+        return self.cached_symbols
+
+    def operands(self):
+        return (self.left, self.right)
+
+    def expression(self, operands, indices):
+        left, right = operands
+        return f"((not {left}) == (not {right}))"
+
+    def columns(self, operands, indices):
+        left, right = operands
+        return f"(ones ^ {left} ^ {right})"
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Compiles a logical sentence into a function of a model, an integer
+    whose bit i is the value of symbols[i], that returns its truth value.
+    The conjuncts of a top-level And are checked one by one, returning
+    False at the first one that is false.
+    """
+    key = ("sentence", tuple(symbols))
+    compiled = cached_function(sentence, key)
+    if compiled is not None:
+        return compiled
+    indices = {symbol: i for i, symbol in enumerate(symbols)}
+    names = {}
+    lines = []
+    if isinstance(sentence, And):
+        for conjunct in sentence.conjuncts:
+            value = assign(conjunct, "expression", indices, names, lines)
+            lines.append(f"if not {value}: return False")
+        lines.append("return True")
+    else:
+        value = assign(sentence, "expression", indices, names, lines)
+        lines.append(f"return {value}")
+    return cache_function(sentence, key, define("m", lines))
+
+
+def cached_function(sentence, key):
+    """Returns the function compiled for a sentence under key, or None."""
+    if sentence.cached_compiled is None:
+        return None
+    return sentence.cached_compiled.get(key)
+
+
+def cache_function(sentence, key, compiled):
+    """
+    Keeps a function compiled for a sentence under key, for up to
+    COMPILED keys per sentence, and returns it. Sentences are shared
+    and immutable (an And forgets its functions when added to), so the
+    function stays valid.
+    """
+    if sentence.cached_compiled is None or len(sentence.cached_compiled) >= COMPILED:
+        sentence.cached_compiled = {}
+    sentence.cached_compiled[key] = compiled
+    return compiled
+
+
+def assign(sentence, method, indices, names, lines):
+    """
+    Returns a Python expression for the value of a sentence, built with
+    the named method ("expression" or "columns") of it and its
+    subsentences from the expressions of their operands. names maps the
+    id() of subsentences to (expression, nesting depth) and is filled in.
+
+    Python cannot compile expressions nested a few hundred levels deep,
+    so subexpressions that would nest more than NESTING levels are
+    assigned to temporaries t0, t1, ... by statements appended to lines,
+    keeping the code flat however deep the sentence is. Every operand
+    counts as a level, since chains of binary operators nest too.
+    """
+    stack = [sentence]
+    while stack:
+        node = stack[-1]
+        key = id(node)
+        if key in names:
+            stack.pop()
+            continue
+        operands = node.operands()
+        ready = True
+        for operand in operands:
+            if id(operand) not in names:
+                stack.append(operand)
+                ready = False
+        if not ready:
+            continue
+        stack.pop()
+        expressions = []
+        depth = 0
+        for operand in operands:
+            expression, nested = names[id(operand)]
+            expressions.append(expression)
+            if nested > depth:
+                depth = nested
+        value = getattr(node, method)(expressions, indices)
+        depth += len(operands) or 1
+        if depth > NESTING:
+            name = f"t{len(lines)}"
+            lines.append(f"{name} = {value}")
+            value, depth = name, 0
+        names[key] = (value, depth)
+    return names[id(sentence)][0]
+
+
+def join_columns(operator, operands):
+    """
+    Joins column expressions with a bitwise operator, in groups of at
+    most NESTING so that long joins do not nest deeply.
+    """
+    while len(operands) > NESTING:
+        operands = ["(" + f" {operator} ".join(operands[i:i + NESTING]) + ")"
+                    for i in range(0, len(operands), NESTING)]
+    return "(" + f" {operator} ".join(operands) + ")"
+
+
+def define(parameters, lines):
+    """Returns a function of parameters whose body is the given lines."""
+    body = "".join(f"    {line}\n" for line in lines)
+    namespace = {}
+    exec(f"def compiled({parameters}):\n{body}", namespace)
+    return namespace["compiled"]
 
 
 def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    """
+    Checks if knowledge base entails query. To also count the models of
+    knowledge, call table_check(knowledge, query, count=True).
+    """
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+    # Get all symbols in both knowledge and query
+    symbols = sorted(knowledge.symbol_set() | query.symbol_set())
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+    # Evaluate the truth table in bulk if it is not too large
+    if len(symbols) <= TABLE_SYMBOLS:
+        return table_check(knowledge, query)
 
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    # Evaluate both on models numbered 0 to 2^n - 1 rather than dicts
+    knowledge = compile_sentence(knowledge, symbols)
+    query = compile_sentence(query, symbols)
 
     # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    return check_all(knowledge, query, 0, 1 << len(symbols))
+
+
+def check_all(knowledge, query, start, stop):
+    """Checks if compiled knowledge entails query in models start to stop - 1."""
+    for model in range(start, stop):
+
+        # If knowledge base is true in model, then query must also be true
+        if knowledge(model) and not query(model):
+            return False
+    return True
+
+
+def compile_columns(sentence, symbols):
+    """
+    Compiles a logical sentence into a function of truth columns c and
+    ones (see Sentence.columns) for the symbols in order.
+    """
+    key = ("columns", tuple(symbols))
+    compiled = cached_function(sentence, key)
+    if compiled is not None:
+        return compiled
+    indices = {symbol: i for i, symbol in enumerate(symbols)}
+    lines = []
+    value = assign(sentence, "columns", indices, {}, lines)
+    lines.append(f"return {value}")
+    return cache_function(sentence, key, define("c, ones", lines))
+
+
+def table_check(knowledge, query, count=False):
+    """
+    Checks if knowledge base entails query by evaluating both on the whole
+    truth table, 2^CHUNK_BITS models at a time as the bits of integers.
+    With count, returns (entailment, number of models of knowledge);
+    this is the way to count models, model_check only answers entailment.
+    """
+    symbols = sorted(knowledge.symbol_set() | query.symbol_set())
+    knowledge = compile_columns(knowledge, symbols)
+    query = compile_columns(query, symbols)
+    chunks = 1 << max(len(symbols) - CHUNK_BITS, 0)
+    return check_chunks(knowledge, query, len(symbols), 0, chunks, count)
+
+
+def check_chunks(knowledge, query, n, start, stop, count=False):
+    """
+    Checks if compiled knowledge entails query (see compile_columns) in
+    chunks start to stop - 1 of the truth table of n symbols.
+    With count, returns (entailment, number of models of knowledge).
+    """
+    # The first symbols vary within a chunk, the rest from chunk to chunk
+    low = min(n, CHUNK_BITS)
+    size = 1 << low
+    ones = (1 << size) - 1
+    columns = [truth_column(i, size) for i in range(low)]
+
+    entailed = True
+    models = 0
+    for chunk in range(start, stop):
+        c = columns + [ones if chunk >> i & 1 else 0 for i in range(n - low)]
+        known = knowledge(c, ones)
+
+        # Every model of the knowledge base must be a model of query
+        if known & ~query(c, ones):
+            entailed = False
+            if not count:
+                break
+        if count:
+            models += bin(known).count("1")
+    return (entailed, models) if count else entailed
+
+
+def parallel_check(knowledge, query, processes=None, pool=None):
+    """
+    Checks if knowledge base entails query like table_check, splitting
+    the truth table on the values of its last symbols into ranges that a
+    pool of processes checks, and stopping as soon as one range has a
+    counter-model. Up to SERIAL_SYMBOLS symbols are checked in-process.
+
+    A new pool is started for every call unless a CheckPool is given.
+    """
+    symbols = sorted(knowledge.symbol_set() | query.symbol_set())
+    if pool is not None:
+        processes = pool.processes
+    processes = processes or os.cpu_count()
+    if len(symbols) <= SERIAL_SYMBOLS or processes == 1:
+        return table_check(knowledge, query)
+
+    # 2^k jobs of equally many chunks each, k being at most the chunk count
+    chunks = 1 << max(len(symbols) - CHUNK_BITS, 0)
+    jobs = min(chunks, 1 << (JOBS_PER_PROCESS * processes - 1).bit_length())
+    ranges = [(start, start + chunks // jobs)
+              for start in range(0, chunks, chunks // jobs)]
+    if pool is not None:
+        return pool.check(knowledge, query, symbols, ranges)
+
+    # Leaving the with block terminates the pool, cancelling all other jobs
+    with multiprocessing.Pool(processes, initializer=load_check,
+                              initargs=(knowledge, query, symbols, CHUNK_BITS)) as pool:
+        for entailed in pool.imap_unordered(check_range, ranges):
+            if not entailed:
+                return False
+    return True
+
+
+def load_check(knowledge, query, symbols, chunk_bits):
+    """Compiles knowledge and query once per parallel_check worker."""
+    global worker_check, CHUNK_BITS
+    CHUNK_BITS = chunk_bits
+    worker_check = (None,
+                    compile_columns(knowledge, symbols),
+                    compile_columns(query, symbols),
+                    len(symbols))
+
+
+def check_range(chunks):
+    """Checks a range (start, stop) of chunks in a parallel_check worker."""
+    _, knowledge, query, n = worker_check
+    return check_chunks(knowledge, query, n, *chunks)
+
+
+class CheckPool():
+
+    def __init__(self, processes=None):
+        """
+        Starts a pool of processes that parallel_check calls can share
+        instead of starting their own. chunks counts the truth table
+        chunks of all jobs that have finished, checked in the workers.
+        """
+        self.processes = processes or os.cpu_count()
+        self.cancelled = multiprocessing.Value("q", -1)
+        self.pool = multiprocessing.Pool(self.processes, initializer=load_pool,
+                                         initargs=(self.cancelled,))
+        self.checks = 0
+        self.chunks = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def close(self):
+        """Terminates the workers."""
+        self.pool.terminate()
+        self.pool.join()
+
+    def check(self, knowledge, query, symbols, ranges):
+        """
+        Checks if knowledge base entails query in ranges (start, stop) of
+        the chunks of its truth table, as parallel_check does. Once one
+        range has a counter-model, the jobs of the check that have not
+        started yet are skipped.
+        """
+        check = self.checks
+        self.checks += 1
+        jobs = [(check, knowledge, query, symbols, CHUNK_BITS, start, stop)
+                for start, stop in ranges]
+        for entailed, chunks in self.pool.imap_unordered(check_job, jobs):
+            self.chunks += chunks
+            if not entailed:
+                self.cancelled.value = check
+                return False
+        return True
+
+
+def load_pool(cancelled):
+    """Keeps the shared id of the last cancelled check in a CheckPool worker."""
+    global worker_cancelled
+    worker_cancelled = cancelled
+
+
+def check_job(job):
+    """
+    Checks a range of chunks of a CheckPool check in one of its workers,
+    compiling knowledge and query once per check and worker. Returns
+    whether knowledge entails query there and how many chunks were checked.
+    """
+    global worker_check, CHUNK_BITS
+    check, knowledge, query, symbols, CHUNK_BITS, start, stop = job
+    if worker_cancelled.value == check:
+        return True, 0
+    if worker_check is None or worker_check[0] != check:
+        worker_check = (check,
+                        compile_columns(knowledge, symbols),
+                        compile_columns(query, symbols),
+                        len(symbols))
+    _, knowledge, query, n = worker_check
+    return check_chunks(knowledge, query, n, start, stop), stop - start
+
+
+def truth_column(i, size):
+    """Returns the integer whose bit k is bit i of k, for k below size."""
+    column = ((1 << (1 << i)) - 1) << (1 << i)
+    period = 2 << i
+    while period < size:
+        column |= column << period
+        period *= 2
+    return column
@@ -0,0 +1,250 @@
+"""
+Knights and knaves puzzle generator and solver benchmark
+
+Generates random puzzles in the style of puzzle.py, where knights only
+say true things and knaves only false ones, solves every puzzle with
+every entailment backend and reports solve times, models or decisions
+explored, and any backend whose answer disagrees with model_check or
+with the hidden roles the puzzle was generated from.
+"""
+
+import random
+import string
+import sys
+import time
+
+import logic
+import sat
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# (characters, statements) of the default puzzle sizes
+SIZES = [(2, 2), (3, 3), (5, 5), (8, 10), (12, 16), (40, 60)]
+
+PUZZLES = 20
+
+# Deepest nesting of connectives in a statement
+DEPTH = 2
+
+SEED = 0
+
+# Pool of processes that all parallel_check calls share, see main()
+check_pool = None
+
+
+def character_names(characters):
+    """Returns names for a number of characters: A, B, ..., Z, A1, B1, ..."""
+    return [string.ascii_uppercase[i % 26] + (str(i // 26) if i >= 26 else "")
+            for i in range(characters)]
+
+
+def generate_claim(rng, knights, knaves, depth):
+    """Returns a random claim about the characters, a logical sentence."""
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(knights + knaves)
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(generate_claim(rng, knights, knaves, depth - 1))
+    left = generate_claim(rng, knights, knaves, depth - 1)
+    right = generate_claim(rng, knights, knaves, depth - 1)
+    if kind == 1:
+        return And(left, right)
+    if kind == 2:
+        return Or(left, right)
+    if kind == 3:
+        return Implication(left, right)
+    return Biconditional(left, right)
+
+
+def generate_puzzle(characters, statements, rng):
+    """
+    Returns a random puzzle as (knowledge, symbols, roles, statements):
+    the knowledge base, the knight and knave symbols of every character,
+    the set of symbols that are true in the hidden roles the puzzle was
+    made from, and the (speaker, claim) statements.
+    """
+    names = character_names(characters)
+    knights = [Symbol(f"{name} is a Knight") for name in names]
+    knaves = [Symbol(f"{name} is a Knave") for name in names]
+    hidden = [rng.random() < 0.5 for _ in names]
+    roles = {knights[i] if knight else knaves[i] for i, knight in enumerate(hidden)}
+    model = {symbol.name: symbol in roles for symbol in knights + knaves}
+
+    # Either Knight or Knave
+    knowledge = And()
+    for knight, knave in zip(knights, knaves):
+        knowledge.add(Or(knight, knave))
+        knowledge.add(Not(And(knight, knave)))
+
+    # Knights say true claims and knaves false ones, so every claim is
+    # negated where needed to fit the role of its speaker
+    said = []
+    for _ in range(statements):
+        speaker = rng.randrange(characters)
+        claim = generate_claim(rng, knights, knaves, DEPTH)
+        if claim.evaluate(model) != hidden[speaker]:
+            claim = Not(claim)
+        knowledge.add(Implication(knights[speaker], claim))
+        knowledge.add(Implication(knaves[speaker], Not(claim)))
+        said.append((names[speaker], claim))
+    return knowledge, knights + knaves, roles, said
+
+
+def solve_model_check(knowledge, symbols):
+    """Returns the entailed symbols, by logic.model_check per symbol."""
+    return {symbol for symbol in symbols if logic.model_check(knowledge, symbol)}
+
+
+def solve_check_all(knowledge, symbols):
+    """Returns the entailed symbols, by scalar enumeration per symbol."""
+    names = sorted(knowledge.symbol_set())
+    compiled = logic.compile_sentence(knowledge, names)
+    return {symbol for symbol in symbols
+            if logic.check_all(compiled, logic.compile_sentence(symbol, names),
+                               0, 1 << len(names))}
+
+
+def solve_parallel_check(knowledge, symbols):
+    """Returns the entailed symbols, by logic.parallel_check per symbol."""
+    return {symbol for symbol in symbols
+            if logic.parallel_check(knowledge, symbol, pool=check_pool)}
+
+
+def solve_sat(knowledge, symbols):
+    """Returns the entailed symbols, by sat.model_check per symbol."""
+    return {symbol for symbol in symbols if sat.model_check(knowledge, symbol)}
+
+
+def solve_knowledge_base(knowledge, symbols):
+    """Returns the entailed symbols, by one sat.KnowledgeBase."""
+    return sat.KnowledgeBase(knowledge).entailed(symbols)
+
+
+# Backends as (name, solve, largest number of characters to use it for)
+BACKENDS = [
+    ("model_check", solve_model_check, 12),
+    ("check_all", solve_check_all, 8),
+    ("parallel_check", solve_parallel_check, 12),
+    ("sat.model_check", solve_sat, None),
+    ("KnowledgeBase", solve_knowledge_base, None)
+]
+
+
+def count_explored(solve, knowledge, symbols):
+    """
+    Returns how many models the knowledge base was evaluated in, or for
+    SAT backends how many decisions the solvers made, in one solve. They
+    are counted by wrapping logic's compilers and sat.Solver.solve
+    (outside of any timing), and for parallel_check workers from the
+    chunks of the jobs check_pool saw finish.
+    """
+    compile_sentence = logic.compile_sentence
+    compile_columns = logic.compile_columns
+    solver_solve = sat.Solver.solve
+    explored = 0
+    chunks = check_pool.chunks if check_pool is not None else 0
+
+    def counting_compile_sentence(sentence, names):
+        compiled = compile_sentence(sentence, names)
+        if sentence is not knowledge:
+            return compiled
+
+        def counting(model):
+            nonlocal explored
+            explored += 1
+            return compiled(model)
+        return counting
+
+    def counting_compile_columns(sentence, names):
+        compiled = compile_columns(sentence, names)
+        if sentence is not knowledge:
+            return compiled
+
+        def counting(c, ones):
+            nonlocal explored
+            explored += ones.bit_length()
+            return compiled(c, ones)
+        return counting
+
+    def counting_solve(solver, *args):
+        nonlocal explored
+        decisions = solver.decisions
+        try:
+            return solver_solve(solver, *args)
+        finally:
+            explored += solver.decisions - decisions
+
+    logic.compile_sentence = counting_compile_sentence
+    logic.compile_columns = counting_compile_columns
+    sat.Solver.solve = counting_solve
+    try:
+        solve(knowledge, symbols)
+    finally:
+        logic.compile_sentence = compile_sentence
+        logic.compile_columns = compile_columns
+        sat.Solver.solve = solver_solve
+    if check_pool is not None:
+        explored += (check_pool.chunks - chunks) << logic.CHUNK_BITS
+    return explored
+
+
+def benchmark(characters, statements, puzzles, rng):
+    """
+    Generates puzzles of one size and prints, for every backend, solve
+    time percentiles, mean models or decisions explored per puzzle, and
+    how many puzzles it answered differently from the first backend or
+    inconsistently with the hidden roles.
+    """
+    generated = [generate_puzzle(characters, statements, rng)
+                 for _ in range(puzzles)]
+    backends = [(name, solve) for name, solve, limit in BACKENDS
+                if limit is None or characters <= limit]
+
+    answers = [{} for _ in generated]
+    rows = []
+    for name, solve in backends:
+        latencies = []
+        explored = 0
+        for i, (knowledge, symbols, _, _) in enumerate(generated):
+            start = time.perf_counter()
+            answers[i][name] = solve(knowledge, symbols)
+            latencies.append(time.perf_counter() - start)
+            explored += count_explored(solve, knowledge, symbols)
+        rows.append((name, sorted(latencies), explored / puzzles))
+
+    # Every backend must agree with the first, and entail only true roles
+    reference = backends[0][0]
+    print(f"{characters} characters, {statements} statements, {puzzles} puzzles")
+    for name, latencies, explored in rows:
+        wrong = sum(1 for i, (_, _, roles, _) in enumerate(generated)
+                    if answers[i][name] != answers[i][reference]
+                    or not answers[i][name] <= roles)
+        p50, p90 = (1000 * latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+                    for q in (0.5, 0.9))
+        print(f"  {name:<18}{p50:>10.3f}{p90:>10.3f}{1000 * latencies[-1]:>10.3f}"
+              f"{explored:>14.0f}{wrong:>7}")
+
+    solved = sum(1 for i in range(puzzles)
+                 if len(answers[i][reference]) == characters)
+    print(f"  fully determined: {solved} of {puzzles}")
+
+
+def main():
+    global check_pool
+    if len(sys.argv) not in [1, 2, 4]:
+        sys.exit("Usage: python puzzle_bench.py [puzzles [characters statements]]")
+    puzzles = int(sys.argv[1]) if len(sys.argv) > 1 else PUZZLES
+    sizes = [tuple(map(int, sys.argv[2:4]))] if len(sys.argv) == 4 else SIZES
+
+    rng = random.Random(SEED)
+    print(f"  {'backend':<18}{'p50 ms':>10}{'p90 ms':>10}{'max ms':>10}"
+          f"{'explored':>14}{'wrong':>7}")
+
+    # Starting processes once rather than for every parallel_check call
+    # keeps pool startup out of its latencies
+    with logic.CheckPool() as check_pool:
+        for characters, statements in sizes:
+            benchmark(characters, statements, puzzles, rng)
+
+
+if __name__ == "__main__":
+    main()
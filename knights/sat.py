@@ -0,0 +1,431 @@
+"""
+SAT-based entailment for logic sentences
+
+Sentences are converted to CNF by Tseitin encoding (one fresh variable
+per compound subsentence, so the CNF grows linearly with the sentence)
+and checked by a CDCL solver: DPLL search with unit propagation on two
+watched literals, first-UIP clause learning and non-chronological
+backjumping. Literals are nonzero ints, -v being the negation of v.
+"""
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Activity decay per conflict, as a growth factor of the bump increment
+DECAY = 1 / 0.95
+
+
+class Solver():
+
+    def __init__(self):
+        """Creates a solver without variables or clauses."""
+        # Symbol names and encoded sentences -> their variable or literal
+        self.names = {}
+        self.literals = {}
+        self.true = None
+
+        # Per variable (index 0 unused): value, decision level, reason
+        # clause, saved phase and branching activity
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.phases = [False]
+        self.activity = [0.0]
+        self.increment = 1.0
+
+        # Literal -> clauses watching it, which are visited once it is false
+        self.watches = {}
+        self.clauses = []
+        self.learned = []
+
+        # Assigned literals in order, the trail index where each decision
+        # level starts, and the next trail index to propagate
+        self.trail = []
+        self.limits = []
+        self.head = 0
+
+        # False once the clauses are unsatisfiable on their own
+        self.ok = True
+
+        self.decisions = 0
+        self.conflicts = 0
+        self.propagations = 0
+
+    def new_variable(self):
+        """Adds a fresh variable and returns it."""
+        self.values.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.phases.append(False)
+        self.activity.append(0.0)
+        variable = len(self.values) - 1
+        self.watches[variable] = []
+        self.watches[-variable] = []
+        return variable
+
+    def value(self, literal):
+        """Returns the value of a literal: True, False or None if unassigned."""
+        value = self.values[abs(literal)]
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def add_clause(self, literals):
+        """Adds a clause (a disjunction of literals) to the solver."""
+        self.backtrack(0)
+        clause = []
+        for literal in literals:
+            value = self.value(literal)
+            if value is True or -literal in clause:
+                return
+            if value is None and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.ok = False
+        else:
+            self.clauses.append(clause)
+            self.watches[clause[0]].append(clause)
+            self.watches[clause[1]].append(clause)
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to a sentence, Tseitin-encoding it.
+        Subsentences are encoded bottom-up from an explicit stack, so that
+        deep nesting does not run into the recursion limit.
+        """
+        stack = [sentence]
+        while stack:
+            node = stack[-1]
+            if node in self.literals:
+                stack.pop()
+                continue
+            ready = True
+            for operand in node.operands():
+                if operand not in self.literals:
+                    stack.append(operand)
+                    ready = False
+            if ready:
+                stack.pop()
+                self.literals[node] = self.encode(node)
+        return self.literals[sentence]
+
+    def encode(self, sentence):
+        """Returns a literal for a sentence whose operands are encoded."""
+        operands = [self.literals[operand] for operand in sentence.operands()]
+        if isinstance(sentence, Symbol):
+            literal = self.names.get(sentence.name)
+            if literal is None:
+                literal = self.names[sentence.name] = self.new_variable()
+            return literal
+        if isinstance(sentence, Not):
+            return -operands[0]
+        if isinstance(sentence, And):
+            return self.gate(operands, True)
+        if isinstance(sentence, Or):
+            return self.gate(operands, False)
+        if isinstance(sentence, Implication):
+            return self.gate([-operands[0], operands[1]], False)
+        if isinstance(sentence, Biconditional):
+            left, right = operands
+            literal = self.new_variable()
+            self.add_clause([-literal, -left, right])
+            self.add_clause([-literal, left, -right])
+            self.add_clause([literal, left, right])
+            self.add_clause([literal, -left, -right])
+            return literal
+        raise TypeError(f"cannot encode {sentence!r}")
+
+    def gate(self, operands, conjunction):
+        """Returns a literal for the conjunction or disjunction of literals."""
+        if len(operands) == 1:
+            return operands[0]
+        if not operands:
+            if self.true is None:
+                self.true = self.new_variable()
+                self.add_clause([self.true])
+            return self.true if conjunction else -self.true
+
+        # A disjunction is the negated conjunction of the negated operands
+        sign = 1 if conjunction else -1
+        literal = self.new_variable()
+        for operand in operands:
+            self.add_clause([-literal, sign * operand])
+        self.add_clause([literal] + [-sign * operand for operand in operands])
+        return sign * literal
+
+    def add(self, sentence):
+        """Adds a sentence that must be true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.add_clause([self.literal(disjunct)
+                             for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.add_clause([-self.literal(sentence.antecedent),
+                             self.literal(sentence.consequent)])
+        else:
+            self.add_clause([self.literal(sentence)])
+
+    def assign(self, literal, reason):
+        """Makes a literal true at the current decision level."""
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = len(self.limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """Propagates unit clauses; returns a conflicting clause or None."""
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            self.propagations += 1
+            watching = self.watches[false]
+            kept = []
+            for i, clause in enumerate(watching):
+                # Keep the other watched literal in clause[0]
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                other = clause[0]
+                if self.value(other) is True:
+                    kept.append(clause)
+                    continue
+
+                # Watch another literal that is not false, if there is one
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], false
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(other) is False:
+                        kept.extend(watching[i + 1:])
+                        self.watches[false] = kept
+                        return clause
+                    self.assign(other, clause)
+            self.watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the first-UIP clause learned from a conflict, with its
+        asserting literal first, and the level to backjump to.
+        """
+        level = len(self.limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        index = len(self.trail) - 1
+        literal = None
+        clause = conflict
+        while True:
+            for other in clause:
+                variable = abs(other)
+                if other == literal or variable in seen or not self.levels[variable]:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Resolve with the reason of the latest seen literal on the trail
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if not pending:
+                break
+            clause = self.reasons[abs(literal)]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+        deepest = max(range(1, len(learned)),
+                      key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        """Raises the branching activity of a variable seen in a conflict."""
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+
+    def backtrack(self, level):
+        """Undoes all assignments above a decision level."""
+        if len(self.limits) <= level:
+            return
+        start = self.limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.values[variable] = None
+            self.reasons[variable] = None
+            self.phases[variable] = literal > 0
+        del self.trail[start:]
+        del self.limits[level:]
+        self.head = min(self.head, start)
+
+    def pick(self):
+        """Returns the unassigned variable of highest activity, or None."""
+        best = None
+        best_activity = -1.0
+        for variable in range(1, len(self.values)):
+            if self.values[variable] is None and self.activity[variable] > best_activity:
+                best = variable
+                best_activity = self.activity[variable]
+        return best
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with all assumption
+        literals true, leaving a model in `values`, and False otherwise.
+        Learned clauses are kept for later calls.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.limits:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.learned.append(learned)
+                    self.watches[learned[0]].append(learned)
+                    self.watches[learned[1]].append(learned)
+                    self.assign(learned[0], learned)
+                self.increment *= DECAY
+                continue
+
+            # Assumptions are the first decisions, one per level
+            level = len(self.limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value is False:
+                    return False
+                self.limits.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.pick()
+            if variable is None:
+                return True
+            self.decisions += 1
+            self.limits.append(len(self.trail))
+            self.assign(variable if self.phases[variable] else -variable, None)
+
+    def model(self):
+        """Returns the symbol names -> values of the last satisfying model."""
+        return {name: self.values[variable] for name, variable in self.names.items()}
+
+
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query, with a SAT solver."""
+    solver = Solver()
+    solver.add(knowledge)
+    return not solver.solve([-solver.literal(query)])
+
+
+class KnowledgeBase():
+
+    def __init__(self, *sentences):
+        """
+        Creates a knowledge base of sentences that are all true, which
+        keeps its solver, learned clauses and satisfying models between
+        queries. More sentences can be added with add().
+        """
+        self.solver = Solver()
+        self.knowledge = And()
+
+        # Query -> whether it is entailed, and models of the knowledge base
+        # (symbol names -> values) found so far
+        self.answers = {}
+        self.models = []
+
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        self.solver.add(sentence)
+        self.knowledge.add(sentence)
+
+        # Entailed queries stay entailed, but old models may no longer be
+        self.answers = {query: True for query, entailed in self.answers.items()
+                        if entailed}
+        self.models = []
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        if query in self.answers:
+            return self.answers[query]
+
+        # A known model in which query is false is a counter-example
+        symbols = query.symbol_set()
+        entailed = None
+        for model in self.models:
+            if symbols <= model.keys() and not query.evaluate(model):
+                entailed = False
+                break
+
+        if entailed is None:
+            solver = self.solver
+            entailed = not solver.solve([-solver.literal(query)])
+            if not entailed:
+                self.models.append(solver.model())
+        self.answers[query] = entailed
+        return entailed
+
+    def ask(self, queries):
+        """Returns whether the knowledge base entails each of the queries."""
+        return [self.entails(query) for query in queries]
+
+    def entailed(self, symbols=None):
+        """
+        Returns the set of symbols that the knowledge base entails, out of
+        the given ones or else all of its symbols. Every model found rules
+        out all symbols that are false in it, so most symbols are settled
+        without a search of their own.
+        """
+        if symbols is None:
+            symbols = [Symbol(name) for name in sorted(self.knowledge.symbol_set())]
+        if not self.solver.ok:
+            return set(symbols)
+        if not self.models and self.solver.solve():
+            self.models.append(self.solver.model())
+
+        candidates = []
+        for symbol in symbols:
+            if all(model.get(symbol.name, False) for model in self.models):
+                candidates.append(symbol)
+            else:
+                self.answers[symbol] = False
+
+        entailed = set()
+        while candidates:
+            symbol = candidates.pop()
+            if self.entails(symbol):
+                entailed.add(symbol)
+            else:
+                model = self.models[-1]
+                candidates = [candidate for candidate in candidates
+                              if model.get(candidate.name, False)]
+        return entailed
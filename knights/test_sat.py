@@ -0,0 +1,84 @@
+"""
+Cross-checks the SAT backend against logic.model_check
+
+Run with pytest, or as python test_sat.py [sentences] to check more
+random sentences than the default.
+"""
+
+import random
+import sys
+
+import logic
+import sat
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+SENTENCES = 300
+
+# Deepest nesting of connectives in a random sentence
+DEPTH = 4
+
+SEED = 0
+
+
+def random_sentence(rng, symbols, depth):
+    """Returns a random sentence over symbols, nested up to depth levels."""
+    if depth == 0 or rng.random() < 0.25:
+        return rng.choice(symbols)
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(random_sentence(rng, symbols, depth - 1))
+    if kind in [1, 2]:
+        operands = [random_sentence(rng, symbols, depth - 1)
+                    for _ in range(rng.randrange(4))]
+        return And(*operands) if kind == 1 else Or(*operands)
+    left = random_sentence(rng, symbols, depth - 1)
+    right = random_sentence(rng, symbols, depth - 1)
+    return Implication(left, right) if kind == 3 else Biconditional(left, right)
+
+
+def check_random(sentences=SENTENCES, seed=SEED):
+    """
+    Returns the (knowledge, query) pairs out of random ones for which
+    sat.model_check or sat.KnowledgeBase disagree with logic.model_check.
+    """
+    rng = random.Random(seed)
+    wrong = []
+    for _ in range(sentences):
+        symbols = [Symbol(name) for name in "ABCDEF"[:rng.randrange(1, 7)]]
+        knowledge = And(*[random_sentence(rng, symbols, DEPTH)
+                          for _ in range(rng.randrange(1, 4))])
+        query = random_sentence(rng, symbols, DEPTH - 1)
+        expected = logic.model_check(knowledge, query)
+        if (sat.model_check(knowledge, query) != expected
+                or sat.KnowledgeBase(knowledge).entails(query) != expected):
+            wrong.append((knowledge, query))
+    return wrong
+
+
+def test_random_sentences():
+    assert check_random() == []
+
+
+def test_deep_nesting():
+    a, b = Symbol("A"), Symbol("B")
+    sentence = a
+    for _ in range(2000):
+        sentence = Or(Not(b), sentence)
+    assert sat.model_check(And(a), sentence)
+    assert not sat.model_check(And(b), sentence)
+    assert sat.model_check(And(b, sentence), a)
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python test_sat.py [sentences]")
+    sentences = int(sys.argv[1]) if len(sys.argv) == 2 else SENTENCES
+    wrong = check_random(sentences)
+    for knowledge, query in wrong:
+        print(f"disagree: {knowledge.formula()} |= {query.formula()}")
+    test_deep_nesting()
+    print(f"{sentences - len(wrong)} of {sentences} agree")
+
+
+if __name__ == "__main__":
+    main()
@@ -157,6 +157,96 @@ class Sentence():
             self.cells.remove(cell)
 
 
+class BitSentence():
+    """
+    Logical statement about a Minesweeper game, like Sentence, with
+    its cells as the set bits of an integer. Cell (i, j) has the index
+    i * width + j on the board, and bit k of `bits` stands for the cell
+    with index offset + k. The offset is always the lowest index of the
+    cells, so the integers stay small and equal sentences equal even on
+    large boards.
+    """
+
+    __slots__ = ("offset", "bits", "count")
+
+    def __init__(self, offset, bits, count):
+        if bits:
+            lowest = (bits & -bits).bit_length() - 1
+            offset += lowest
+            bits >>= lowest
+        self.offset = offset
+        self.bits = bits
+        self.count = count
+
+    @classmethod
+    def from_cells(cls, cells, count, width):
+        """
+        Returns the sentence about a set of cells on a board of a width.
+        """
+        indices = [i * width + j for i, j in cells]
+        offset = min(indices, default=0)
+        return cls(offset, sum(1 << (index - offset) for index in set(indices)), count)
+
+    def __eq__(self, other):
+        return (self.offset == other.offset and self.bits == other.bits
+                and self.count == other.count)
+
+    def __hash__(self):
+        return hash((self.offset, self.bits, self.count))
+
+    def __str__(self):
+        return f"{set(self.indices())} = {self.count}"
+
+    def key(self):
+        """
+        Returns the cells as a hashable (offset, bits) pair.
+        """
+        return self.offset, self.bits
+
+    def size(self):
+        """
+        Returns the number of cells.
+        """
+        return bin(self.bits).count("1")
+
+    def indices(self):
+        """
+        Returns the board indices of the cells in increasing order.
+        """
+        indices = []
+        bits = self.bits
+        while bits:
+            lowest = bits & -bits
+            indices.append(self.offset + lowest.bit_length() - 1)
+            bits ^= lowest
+        return indices
+
+    def cells(self, width):
+        """
+        Returns the set of cells on a board of a width.
+        """
+        return {divmod(index, width) for index in self.indices()}
+
+    def issubset(self, other):
+        """
+        Returns True if all cells of this sentence are cells of other.
+        """
+        shift = self.offset - other.offset
+        return shift >= 0 and not (self.bits << shift) & ~other.bits
+
+    def difference(self, other):
+        """
+        Returns the sentence about the cells of this sentence that are not
+        cells of other, which must be a subset of it.
+        """
+        shift = other.offset - self.offset
+        if shift >= 0:
+            bits = self.bits & ~(other.bits << shift)
+        else:
+            bits = self.bits & ~(other.bits >> -shift)
+        return BitSentence(self.offset, bits, self.count - other.count)
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
@@ -175,8 +265,21 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Cells known to be safe that have not been clicked on yet
+        self.safe_moves = set()
+
+        # The same cells as bits of board indices, see BitSentence
+        self.mine_bits = 0
+        self.safe_bits = 0
+
+        # Sentences about the game known to be true, as BitSentences by
+        # their key, and for each board index the keys of the sentences
+        # containing it
+        self.knowledge = {}
+        self.index = {}
+
+        # Keys of sentences that are new or changed since the last inference
+        self.pending = []
 
     def mark_mine(self, cell):
         """
@@ -184,8 +287,10 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        index = cell[0] * self.width + cell[1]
+        self.mine_bits |= 1 << index
+        for key in self.index.pop(index, set()):
+            self.add_sentence(self.remove_sentence(key))
 
     def mark_safe(self, cell):
         """
@@ -193,8 +298,79 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        index = cell[0] * self.width + cell[1]
+        self.safe_bits |= 1 << index
+        for key in self.index.pop(index, set()):
+            self.add_sentence(self.remove_sentence(key))
+
+    def add_sentence(self, sentence):
+        """
+        Adds a BitSentence about the cells that are not yet known to be mines
+        or safe to the knowledge base, unless it is empty or already known,
+        and queues it for inference.
+        """
+        offset = sentence.offset
+        mines = self.mine_bits >> offset & sentence.bits
+        bits = sentence.bits & ~(mines | self.safe_bits >> offset)
+        sentence = BitSentence(offset, bits, sentence.count - bin(mines).count("1"))
+        key = sentence.key()
+        if not sentence.bits or key in self.knowledge:
+            return
+
+        self.knowledge[key] = sentence
+        for index in sentence.indices():
+            self.index.setdefault(index, set()).add(key)
+        self.pending.append(key)
+
+    def remove_sentence(self, key):
+        """
+        Removes the sentence with a key from the knowledge base and
+        returns it.
+        """
+        sentence = self.knowledge.pop(key)
+        for index in sentence.indices():
+            keys = self.index.get(index)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.index[index]
+        return sentence
+
+    def infer(self):
+        """
+        Draws conclusions from the pending sentences until there are none:
+        marks their cells as mines or safe if they are all one or the other,
+        and adds the difference of every pair of a pending sentence and a
+        sentence sharing a cell with it where one is a subset of the other.
+        """
+        while self.pending:
+            key = self.pending.pop()
+            sentence = self.knowledge.get(key)
+            if sentence is None:
+                continue
+
+            size = sentence.size()
+            if size < sentence.count:
+                raise Exception("Impossible Sentence: Count cannot be greater than the number of cells in the set.")
+            if sentence.count == 0 or sentence.count == size:
+                mark = self.mark_safe if sentence.count == 0 else self.mark_mine
+                for cell in sentence.cells(self.width):
+                    mark(cell)
+                continue
+
+            # Only sentences sharing a cell can be subsets of each other
+            neighbors = set()
+            for index in sentence.indices():
+                neighbors |= self.index[index]
+            neighbors.discard(key)
+            for other in neighbors:
+                other = self.knowledge[other]
+                if sentence.issubset(other):
+                    self.add_sentence(other.difference(sentence))
+                elif other.issubset(sentence):
+                    self.add_sentence(sentence.difference(other))
 
     def add_knowledge(self, cell, count):
         """
@@ -213,65 +389,22 @@ class MinesweeperAI():
         """
         # mark the cell as one of the moves made
         self.moves_made.add(cell)
+        self.safe_moves.discard(cell)
 
         # mark the cell as safe
         self.mark_safe(cell)
-        
-        # add a sentence to the kb
+
+        # add a sentence about the neighbors to the kb
         neighbors = []
         x, y = cell
-        count_minus_mines = count
         for i in range(x-1, x+2):
             for j in range(y-1, y+2):
-                neighbor = (i, j)
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if neighbor in self.mines:
-                        count_minus_mines -= 1
-                    elif neighbor in self.safes:
-                        pass
-                    else:
-                        # add undetermined cell
-                        neighbors.append(neighbor)
-
-        new_sentence = Sentence(neighbors, count_minus_mines)
-        self.knowledge.append(new_sentence)
-
-        found_new_knowledge = True
-        while(found_new_knowledge):
-            found_new_knowledge = False # set True later if new knowledge was added/interferered
-
-            # mark additional cells as safe or as mines
-            for sentence in self.knowledge:
-                for cell in sentence.known_mines():
-                    if cell not in self.mines:
-                        self.mark_mine(cell)
-
-            for cell in sentence.known_safes():
-                if cell not in self.safes:
-                    self.mark_safe(cell)
-
-            # add any infered new sentences to the AI's knowledge base
-            if len(new_sentence.cells):
-                for sentence in self.knowledge:
-                    if len(sentence.cells):
-                        if new_sentence.cells.issubset(sentence.cells) and not new_sentence.__eq__(sentence):
-                            # interference = sentence - new_sentence
-                            interference_list = list(sentence.cells.difference(new_sentence.cells))
-                            interference_count = sentence.count - new_sentence.count
-                            interference_sentence = Sentence(interference_list, interference_count)
-                            if interference_sentence not in self.knowledge:
-                                self.knowledge.append(interference_sentence)
-                                found_new_knowledge = True
-
-                        elif sentence.cells.issubset(new_sentence.cells) and not new_sentence.__eq__(sentence):
-                            # interference = new_sentence - sentence  
-                            interference_list = list(new_sentence.cells.difference(sentence.cells))
-                            interference_count = new_sentence.count - sentence.count
-                            interference_sentence = Sentence(interference_list, interference_count)
-                            if interference_sentence not in self.knowledge:
-                                self.knowledge.append(interference_sentence)
-                                found_new_knowledge = True
-                            
+                if (i, j) != cell and 0 <= i < self.height and 0 <= j < self.width:
+                    neighbors.append((i, j))
+        self.add_sentence(BitSentence.from_cells(neighbors, count, self.width))
+
+        # mark cells and add sentences inferred from the new knowledge
+        self.infer()
 
     def make_safe_move(self):
         """
@@ -282,17 +415,10 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        moves = []
-        for i in range(self.height):
-            for j in range(self.width):
-                move = (i, j)
-                if move in self.safes and move not in self.moves_made:
-                    moves.append(move)
-        
-        if not len(moves):
+        if not self.safe_moves:
             return None
 
-        selected_move = random.choice(moves)
+        selected_move = random.choice(tuple(self.safe_moves))
         return selected_move
         
 
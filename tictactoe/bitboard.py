@@ -0,0 +1,189 @@
+"""
+Tic Tac Toe bitboard core
+
+A board is a pair (x, o) of 9-bit integers with bit 3 * i + j set
+for every cell (i, j) taken by that player, so that playing a move,
+counting moves and checking for a win are a few integer operations.
+"""
+
+X = "X"
+O = "O"
+
+# All 9 cells taken
+FULL = 0b111111111
+
+# The 8 lines of three cells
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # cols
+    0b100010001, 0b001010100                # diags
+]
+
+# The 8 rotations and reflections of the board as permutations of the
+# cells: cell k of the transformed board is cell SYMMETRIES[s][k]
+SYMMETRIES = [
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),  # identity
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),  # rotate 90 degrees clockwise
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),  # rotate 180 degrees
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),  # rotate 270 degrees clockwise
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),  # mirror left-right
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),  # mirror top-bottom
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),  # mirror on the main diagonal
+    (8, 5, 2, 7, 4, 1, 6, 3, 0)   # mirror on the anti-diagonal
+]
+
+# Lookup tables over all 512 sets of cells
+POPCOUNT = [bin(bits).count("1") for bits in range(FULL + 1)]
+WINS = [any(bits & mask == mask for mask in WIN_MASKS) for bits in range(FULL + 1)]
+CELLS = [[cell for cell in range(9) if bits >> cell & 1] for bits in range(FULL + 1)]
+
+# TRANSFORMS[s][bits] is bits transformed by symmetry s, and
+# INVERSES[s][k] is the cell that cell k ends up on under symmetry s
+TRANSFORMS = [
+    [sum(1 << k for k in range(9) if bits >> symmetry[k] & 1)
+     for bits in range(FULL + 1)]
+    for symmetry in SYMMETRIES
+]
+INVERSES = [
+    tuple(symmetry.index(cell) for cell in range(9))
+    for symmetry in SYMMETRIES
+]
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return (0, 0)
+
+
+def from_board(board):
+    """
+    Returns the bitboard of a 3x3 list board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return (x, o)
+
+
+def to_board(board):
+    """
+    Returns the 3x3 list board of a bitboard.
+    """
+    x, o = board
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else None
+             for j in range(3)]
+            for i in range(3)]
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = board
+    return X if POPCOUNT[x] == POPCOUNT[o] else O
+
+
+def moves(board):
+    """
+    Returns the list of empty cell indices on the board.
+    """
+    x, o = board
+    return CELLS[FULL & ~(x | o)]
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    return {divmod(cell, 3) for cell in moves(board)}
+
+
+def play(board, cell):
+    """
+    Returns the board that results from the current player taking a cell,
+    which must be empty.
+    """
+    x, o = board
+    if POPCOUNT[x] == POPCOUNT[o]:
+        return (x | 1 << cell, o)
+    return (x, o | 1 << cell)
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    x, o = board
+    cell = 3 * action[0] + action[1]
+    if (x | o) >> cell & 1:
+        raise Exception("Not a valid action, the cell must be empty!")
+    return play(board, cell)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = board
+    if WINS[x]:
+        return X
+    if WINS[o]:
+        return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = board
+    return WINS[x] or WINS[o] or x | o == FULL
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x, o = board
+    if WINS[x]:
+        return 1
+    if WINS[o]:
+        return -1
+    return 0
+
+
+def canonical(board):
+    """
+    Returns the canonical key of a board, the same integer for all 8 of
+    its rotations and reflections, and the index of the symmetry that
+    produced it.
+    """
+    x, o = board
+    best_key = None
+    best_symmetry = None
+    for symmetry, transform in enumerate(TRANSFORMS):
+        key = transform[x] << 9 | transform[o]
+        if best_key is None or key < best_key:
+            best_key = key
+            best_symmetry = symmetry
+    return best_key, best_symmetry
+
+
+def to_canonical(cell, symmetry):
+    """
+    Returns the canonical cell index of a cell of the board.
+    """
+    return INVERSES[symmetry][cell]
+
+
+def from_canonical(cell, symmetry):
+    """
+    Returns the cell of the board for a canonical cell index.
+    """
+    return SYMMETRIES[symmetry][cell]
@@ -0,0 +1,133 @@
+"""
+Tic Tac Toe opening book
+
+Every position reachable from the empty board, solved once, stored as
+one 16-bit entry per base-3 board index: bit 15 marks a reachable
+position, bits 9-10 hold its value + 1 and bits 0-8 the set of cells
+that are optimal moves. Build it with `python book.py`; minimax also
+builds it on first use if the file is missing.
+"""
+
+import os
+import sys
+from array import array
+
+import bitboard
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# Number of base-3 board indices, one per way to fill the 9 cells
+SIZE = 3 ** 9
+
+REACHABLE = 1 << 15
+
+# TERNARY[bits] is the base-3 index contribution of a set of cells
+TERNARY = [sum(3 ** cell for cell in range(9) if bits >> cell & 1)
+           for bits in range(bitboard.FULL + 1)]
+
+# The loaded book, see table()
+entries = None
+
+
+def index(board):
+    """
+    Returns the base-3 index of a bitboard (empty 0, X 1, O 2 per cell).
+    """
+    x, o = board
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def build():
+    """
+    Returns the book: solves every reachable position by plain minimax,
+    memoized on its base-3 index.
+    """
+    book = array("H", bytes(2 * SIZE))
+
+    def solve(board):
+        i = index(board)
+        if book[i]:
+            return (book[i] >> 9 & 3) - 1
+        if bitboard.terminal(board):
+            value = bitboard.utility(board)
+            book[i] = REACHABLE | (value + 1) << 9
+            return value
+
+        values = {cell: solve(bitboard.play(board, cell))
+                  for cell in bitboard.moves(board)}
+        best = max if bitboard.player(board) == bitboard.X else min
+        value = best(values.values())
+        optimal = sum(1 << cell for cell, v in values.items() if v == value)
+        book[i] = REACHABLE | (value + 1) << 9 | optimal
+        return value
+
+    solve(bitboard.initial_state())
+    return book
+
+
+def save(book, path=BOOK_PATH):
+    """
+    Writes the book to a file as little-endian 16-bit entries.
+    """
+    if sys.byteorder == "big":
+        book = array("H", book)
+        book.byteswap()
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        book.tofile(f)
+    os.replace(temporary, path)
+
+
+def load(path=BOOK_PATH):
+    """
+    Returns the book read from a file, or None if it is missing or damaged.
+    """
+    book = array("H")
+    try:
+        with open(path, "rb") as f:
+            book.fromfile(f, SIZE)
+            if f.read(1):
+                return None
+    except (OSError, EOFError):
+        return None
+    if sys.byteorder == "big":
+        book.byteswap()
+    return book
+
+
+def table():
+    """
+    Returns the book, loading it on first use, or building (and trying
+    to save) it if there is no valid book file.
+    """
+    global entries
+    if entries is None:
+        entries = load()
+        if entries is None:
+            entries = build()
+            try:
+                save(entries)
+            except OSError:
+                pass
+    return entries
+
+
+def lookup(board):
+    """
+    Returns (value, optimal cells) of a bitboard from the book, or None
+    if the position is not in it.
+    """
+    entry = table()[index(board)]
+    if not entry & REACHABLE:
+        return None
+    return (entry >> 9 & 3) - 1, bitboard.CELLS[entry & bitboard.FULL]
+
+
+def main():
+    book = build()
+    save(book)
+    print(f"Solved {sum(1 for entry in book if entry)} positions into {BOOK_PATH}")
+
+
+if __name__ == "__main__":
+    main()
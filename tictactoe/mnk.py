@@ -0,0 +1,341 @@
+"""
+m,n,k Tic Tac Toe Player
+
+An m x n board on which k in a row wins (plain Tic Tac Toe is 3,3,3),
+with an iterative deepening alpha-beta player for boards that are too
+large to search to the end.
+"""
+
+import sys
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a win; heuristic evaluations always stay far below it
+WIN = 1_000_000
+
+# Check the clock every this many searched nodes
+CLOCK_INTERVAL = 1024
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when its time budget has run out.
+    """
+
+
+class MNKGame():
+
+    def __init__(self, m=3, n=3, k=3):
+        """
+        Initialize an m x n board where k in a row wins.
+
+        Internally, boards are bitboards with bit i * (n + 1) + j for
+        cell (i, j); the extra padding bit per row keeps lines from
+        wrapping around the edge when the bitboard is shifted.
+        """
+        if not 1 <= k <= max(m, n):
+            raise ValueError("k must be between 1 and the board size")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.width = n + 1
+        self.cells = [i * self.width + j for i in range(m) for j in range(n)]
+        self.full = sum(1 << cell for cell in self.cells)
+
+        # Shifts for rows, columns, diagonals and anti-diagonals
+        self.directions = [1, self.width, self.width + 1, self.width - 1]
+
+        # Masks of every window of k cells in a line, for the evaluation
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.windows.append(sum(
+                            1 << ((i + di * step) * self.width + j + dj * step)
+                            for step in range(k)
+                        ))
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def to_bits(self, board):
+        """
+        Returns the (x, o) bitboards of a board.
+        """
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, field in enumerate(row):
+                if field == X:
+                    x |= 1 << (i * self.width + j)
+                elif field == O:
+                    o |= 1 << (i * self.width + j)
+        return x, o
+
+    def has_line(self, bits):
+        """
+        Returns True if the set cells of a bitboard contain k in a row.
+        """
+        for direction in self.directions:
+            line = bits
+            for step in range(1, self.k):
+                line &= bits >> (direction * step)
+                if not line:
+                    break
+            if line:
+                return True
+        return False
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x, o = self.to_bits(board)
+        return X if popcount(x) == popcount(o) else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i, row in enumerate(board)
+                for j, field in enumerate(row) if field is EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if board[i][j] is not EMPTY:
+            raise Exception("Not a valid action, the cell must be empty!")
+        result_board = [row.copy() for row in board]
+        result_board[i][j] = self.player(board)
+        return result_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = self.to_bits(board)
+        if self.has_line(x):
+            return X
+        if self.has_line(o):
+            return O
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x, o = self.to_bits(board)
+        return self.has_line(x) or self.has_line(o) or x | o == self.full
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner = self.winner(board)
+        return 1 if winner == X else -1 if winner == O else 0
+
+    def print(self, board):
+        """
+        Prints a text-based representation of the board.
+        """
+        for row in board:
+            print(" ".join(field or "." for field in row))
+
+
+class MNKAI():
+
+    def __init__(self, game, time_limit=1.0, max_depth=None):
+        """
+        Initialize AI for an MNKGame with a time budget per move in seconds,
+        and optionally a maximum search depth.
+
+        The AI remembers between moves
+            - `transpositions`: bitboards -> (depth, value, bound, best cell)
+            - `history`: how often each cell caused an alpha-beta cutoff
+            - `killers`: up to two cutoff cells per ply of the last search
+        """
+        self.game = game
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.transpositions = {}
+        self.history = {}
+        self.killers = {}
+        self.nodes = 0
+        self.depth = 0
+        self.deadline = None
+
+    def choose_action(self, board):
+        """
+        Returns the best action (i, j) for the player to move that iterative
+        deepening finds within the time budget, or None if the game is over.
+        """
+        game = self.game
+        x, o = game.to_bits(board)
+        if game.has_line(x) or game.has_line(o) or x | o == game.full:
+            return None
+        me, them = (x, o) if popcount(x) == popcount(o) else (o, x)
+
+        self.deadline = time.monotonic() + self.time_limit
+        self.nodes = 0
+        self.killers = {}
+        empty = popcount(game.full & ~(me | them))
+        max_depth = empty if self.max_depth is None else min(self.max_depth, empty)
+
+        # Always have a move, even if not even depth 1 completes
+        best = self.ordered_moves(me, them, 0, None)[0]
+        for depth in range(1, max_depth + 1):
+            try:
+                value = self.search(me, them, depth, -WIN - 1, WIN + 1, 0)
+            except SearchTimeout:
+                break
+            best = self.transpositions[(me, them)][3]
+            self.depth = depth
+            # A forced win or loss will not change with more depth
+            if abs(value) > WIN - game.m * game.n:
+                break
+        return divmod(best, game.width)
+
+    def search(self, me, them, depth, alpha, beta, ply):
+        """
+        Returns the negamax value of a position for the player to move,
+        whose stones are `me`, searching depth plies with alpha-beta.
+        """
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and time.monotonic() > self.deadline:
+            raise SearchTimeout()
+
+        game = self.game
+        if me | them == game.full:
+            return 0
+        if depth == 0:
+            return self.evaluate(me, them)
+
+        key = (me, them)
+        entry = self.transpositions.get(key)
+        if entry is not None and entry[0] >= depth:
+            _, value, bound, _ = entry
+            if (bound == 0
+                    or (bound > 0 and value >= beta)
+                    or (bound < 0 and value <= alpha)):
+                return value
+
+        original_alpha = alpha
+        best_value = -WIN - 1
+        best_cell = None
+        hint = entry[3] if entry is not None else None
+        for cell in self.ordered_moves(me, them, ply, hint):
+            played = me | 1 << cell
+            if game.has_line(played):
+                value = WIN - ply
+            else:
+                value = -self.search(them, played, depth - 1, -beta, -alpha, ply + 1)
+            if value > best_value:
+                best_value = value
+                best_cell = cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                self.record_cutoff(cell, depth, ply)
+                break
+
+        # Bound: 0 exact, 1 lower bound (fail high), -1 upper bound (fail low)
+        if best_value <= original_alpha:
+            bound = -1
+        elif best_value >= beta:
+            bound = 1
+        else:
+            bound = 0
+        self.transpositions[key] = (depth, best_value, bound, best_cell)
+        return best_value
+
+    def ordered_moves(self, me, them, ply, hint):
+        """
+        Returns the empty cells in search order: the transposition table
+        move, then killer moves of this ply, then by history score and
+        closeness to the center.
+        """
+        game = self.game
+        taken = me | them
+        center_i = (game.m - 1) / 2
+        center_j = (game.n - 1) / 2
+        killers = self.killers.get(ply, [])
+
+        def priority(cell):
+            i, j = divmod(cell, game.width)
+            return (
+                cell != hint,
+                cell not in killers,
+                -self.history.get(cell, 0),
+                abs(i - center_i) + abs(j - center_j)
+            )
+        return sorted(
+            (cell for cell in game.cells if not taken >> cell & 1),
+            key=priority
+        )
+
+    def record_cutoff(self, cell, depth, ply):
+        """
+        Remembers a cell that caused an alpha-beta cutoff as a killer move
+        of its ply and raises its history score.
+        """
+        killers = self.killers.setdefault(ply, [])
+        if cell not in killers:
+            killers.insert(0, cell)
+            del killers[2:]
+        self.history[cell] = self.history.get(cell, 0) + depth * depth
+
+    def evaluate(self, me, them):
+        """
+        Returns a heuristic value of a position for the player to move:
+        every window of k cells that only one player has stones in counts
+        for that player, more the more stones it already holds.
+        """
+        score = 0
+        for window in self.game.windows:
+            mine = window & me
+            theirs = window & them
+            if mine and not theirs:
+                score += 4 ** popcount(mine)
+            elif theirs and not mine:
+                score -= 4 ** popcount(theirs)
+        return score
+
+
+def popcount(bits):
+    """
+    Returns the number of set bits of a bitboard.
+    """
+    return bin(bits).count("1")
+
+
+def main():
+    if len(sys.argv) not in [1, 4, 5]:
+        sys.exit("Usage: python mnk.py [m n k [seconds]]")
+    m, n, k = map(int, sys.argv[1:4]) if len(sys.argv) > 1 else (3, 3, 3)
+    time_limit = float(sys.argv[4]) if len(sys.argv) == 5 else 1.0
+
+    # Let the AI play against itself
+    game = MNKGame(m, n, k)
+    ai = MNKAI(game, time_limit)
+    board = game.initial_state()
+    while not game.terminal(board):
+        action = ai.choose_action(board)
+        print(f"{game.player(board)} plays {action} "
+              f"(depth {ai.depth}, {ai.nodes} nodes)")
+        board = game.result(board, action)
+    game.print(board)
+    winner = game.winner(board)
+    print(f"Game Over: {winner} wins." if winner else "Game Over: Tie.")
+
+
+if __name__ == "__main__":
+    main()
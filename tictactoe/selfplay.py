@@ -0,0 +1,133 @@
+"""
+Headless Tic Tac Toe self-play
+
+Plays many games between the AI and/or a random player across a process
+pool and reports throughput, outcomes and AI move latency, without the
+pygame window of runner.py.
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import tictactoe as ttt
+
+PLAYERS = ["ai", "random"]
+
+# Games per task handed to a worker process
+CHUNK = 100
+
+
+def play_game(x_player, o_player, openings, rng):
+    """
+    Plays one game and returns (winner, AI move latencies in seconds).
+    The first `openings` moves are random regardless of the players.
+    """
+    board = ttt.initial_state()
+    latencies = []
+    moves = 0
+    while not ttt.terminal(board):
+        kind = x_player if ttt.player(board) == ttt.X else o_player
+        if kind == "ai" and moves >= openings:
+            start = time.perf_counter()
+            move = ttt.minimax(board)
+            latencies.append(time.perf_counter() - start)
+        else:
+            move = rng.choice(sorted(ttt.actions(board)))
+        board = ttt.result(board, move)
+        moves += 1
+    return ttt.winner(board), latencies
+
+
+def play_games(task):
+    """
+    Plays a chunk of games in a worker process and returns the winner
+    counts and all AI move latencies.
+    """
+    x_player, o_player, openings, games, seed = task
+    rng = random.Random(seed)
+    outcomes = {ttt.X: 0, ttt.O: 0, None: 0}
+    latencies = []
+    for _ in range(games):
+        winner, game_latencies = play_game(x_player, o_player, openings, rng)
+        outcomes[winner] += 1
+        latencies.extend(game_latencies)
+    return outcomes, latencies
+
+
+def simulate(x_player, o_player, games, openings=0, processes=None, seed=0):
+    """
+    Plays games of x_player against o_player on a process pool.
+
+    Returns a dict with the winner counts ("X", "O", "tie"), the wall
+    time in seconds, and the sorted AI move latencies in seconds.
+    """
+    tasks = []
+    for start in range(0, games, CHUNK):
+        tasks.append((x_player, o_player, openings,
+                      min(CHUNK, games - start), seed + start))
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(play_games, tasks)
+    seconds = time.perf_counter() - start
+
+    outcomes = {"X": 0, "O": 0, "tie": 0}
+    latencies = []
+    for chunk_outcomes, chunk_latencies in results:
+        outcomes["X"] += chunk_outcomes[ttt.X]
+        outcomes["O"] += chunk_outcomes[ttt.O]
+        outcomes["tie"] += chunk_outcomes[None]
+        latencies.extend(chunk_latencies)
+    latencies.sort()
+    return {"outcomes": outcomes, "seconds": seconds, "latencies": latencies}
+
+
+def report(x_player, o_player, games, openings, stats):
+    """
+    Prints throughput, outcomes and latency percentiles of a simulation,
+    and flags any game the AI lost, since perfect play never loses.
+    """
+    outcomes = stats["outcomes"]
+    latencies = stats["latencies"]
+    print(f"{x_player} (X) vs {o_player} (O), {games} games, "
+          f"{openings} random opening moves")
+    print(f"    {games / stats['seconds']:.0f} games/s, "
+          f"X wins {outcomes['X']}, O wins {outcomes['O']}, ties {outcomes['tie']}")
+    if latencies:
+        p50, p99 = (latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+                    for q in (0.5, 0.99))
+        print(f"    {len(latencies)} AI moves, p50 {1e6 * p50:.1f}us, "
+              f"p99 {1e6 * p99:.1f}us, max {1e6 * latencies[-1]:.1f}us")
+
+    # Random openings can hand the AI a lost position, so only check without
+    if openings == 0:
+        if x_player == "ai" and outcomes["O"]:
+            print("    WARNING: the AI lost as X")
+        if o_player == "ai" and outcomes["X"]:
+            print("    WARNING: the AI lost as O")
+
+
+def main():
+    if len(sys.argv) not in [1, 2, 4, 5] or any(
+        player not in PLAYERS for player in sys.argv[2:4]
+    ):
+        sys.exit("Usage: python selfplay.py [games [x o [openings]]]  "
+                 f"(players: {', '.join(PLAYERS)})")
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    if len(sys.argv) >= 4:
+        matchups = [(sys.argv[2], sys.argv[3])]
+    else:
+        matchups = [("ai", "random"), ("random", "ai"), ("ai", "ai")]
+    openings = int(sys.argv[4]) if len(sys.argv) == 5 else 0
+
+    print(f"Playing on {os.cpu_count()} processes")
+    for x_player, o_player in matchups:
+        stats = simulate(x_player, o_player, games, openings)
+        report(x_player, o_player, games, openings, stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,60 @@
 Tic Tac Toe Player
 """
 
+import cProfile
 import math
+import time
+
+import bitboard
+import book
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Kinds of values stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Transposition table: maps canonical bitboard keys to
+# (value, bound, best move as a canonical cell index or None)
+transpositions = {}
+
+# Whether minimax answers from the opening book before searching
+use_book = True
+
+# Instrumentation, see instrument(): the SearchStats being recorded by
+# the running minimax call (None when off) and those of the last call
+stats = None
+last_stats = None
+instrumented = False
+
+
+class SearchStats():
+    """
+    Work done by one minimax call.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.cutoffs = 0
+        self.cache_hits = 0
+        self.book_hits = 0
+        self.depth = 0
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return (f"SearchStats(nodes={self.nodes}, cutoffs={self.cutoffs}, "
+                f"cache_hits={self.cache_hits}, book_hits={self.book_hits}, "
+                f"depth={self.depth}, seconds={self.seconds:.6f})")
+
+    def as_dict(self):
+        """
+        Returns the counters as a dict, e.g. for JSON reports.
+        """
+        return dict(vars(self))
+
 
 def initial_state():
     """
@@ -121,37 +169,118 @@ def utility(board):
     return 0
 
 
-def max_value(board, alpha, beta):
+def ordered_moves(board, entry, symmetry):
     """
-    Determines the highest valued action recursively.
+    Returns the empty cells of a bitboard with the best move remembered
+    in the transposition table entry (if any) first, to cut off earlier.
     """
-    value = -math.inf
+    cells = bitboard.moves(board)
+    if entry is None or entry[2] is None:
+        return cells
+    best = bitboard.from_canonical(entry[2], symmetry)
+    return [best] + [cell for cell in cells if cell != best]
 
-    if terminal(board):
-        return utility(board)
-    
-    for possible_action in actions(board):
-        value = max(value, min_value(result(board, possible_action), alpha, beta))
+
+def probe(entry, alpha, beta):
+    """
+    Returns the value of a transposition table entry if it settles the
+    search within the alpha-beta window, None otherwise.
+    """
+    if entry is None:
+        return None
+    value, bound, _ = entry
+    if (bound == EXACT
+            or (bound == LOWER and value >= beta)
+            or (bound == UPPER and value <= alpha)):
+        return value
+    return None
+
+
+def store(key, symmetry, value, alpha, beta, cell):
+    """
+    Stores a searched value, and whether it is exact or only a bound
+    because it fell outside of the (original) alpha-beta window.
+    """
+    if value <= alpha:
+        bound = UPPER
+    elif value >= beta:
+        bound = LOWER
+    else:
+        bound = EXACT
+    if cell is not None:
+        cell = bitboard.to_canonical(cell, symmetry)
+    transpositions[key] = (value, bound, cell)
+
+
+def max_value(board, alpha, beta, depth=0):
+    """
+    Determines the highest valued action recursively on a bitboard.
+    """
+    if stats is not None:
+        stats.nodes += 1
+        stats.depth = max(stats.depth, depth)
+
+    if bitboard.terminal(board):
+        return bitboard.utility(board)
+
+    key, symmetry = bitboard.canonical(board)
+    entry = transpositions.get(key)
+    cached = probe(entry, alpha, beta)
+    if cached is not None:
+        if stats is not None:
+            stats.cache_hits += 1
+        return cached
+
+    value = -math.inf
+    best_cell = None
+    original_alpha = alpha
+    for cell in ordered_moves(board, entry, symmetry):
+        action_value = min_value(bitboard.play(board, cell), alpha, beta, depth + 1)
+        if action_value > value:
+            value = action_value
+            best_cell = cell
         alpha = max(value, alpha)
         if beta <= alpha:
+            if stats is not None:
+                stats.cutoffs += 1
             break
+    store(key, symmetry, value, original_alpha, beta, best_cell)
     return value
 
 
-def min_value(board, alpha, beta):
+def min_value(board, alpha, beta, depth=0):
     """
-    Determines the lowest valued action recursively.
+    Determines the lowest valued action recursively on a bitboard.
     """
-    value = math.inf
+    if stats is not None:
+        stats.nodes += 1
+        stats.depth = max(stats.depth, depth)
 
-    if terminal(board):
-        return utility(board)
+    if bitboard.terminal(board):
+        return bitboard.utility(board)
 
-    for possible_action in actions(board):
-        value = min(value, max_value(result(board, possible_action), alpha, beta))
+    key, symmetry = bitboard.canonical(board)
+    entry = transpositions.get(key)
+    cached = probe(entry, alpha, beta)
+    if cached is not None:
+        if stats is not None:
+            stats.cache_hits += 1
+        return cached
+
+    value = math.inf
+    best_cell = None
+    original_beta = beta
+    for cell in ordered_moves(board, entry, symmetry):
+        action_value = max_value(bitboard.play(board, cell), alpha, beta, depth + 1)
+        if action_value < value:
+            value = action_value
+            best_cell = cell
         beta = min(value, beta)
         if beta <= alpha:
+            if stats is not None:
+                stats.cutoffs += 1
             break
+    store(key, symmetry, value, alpha, original_beta, best_cell)
     return value
 
 
@@ -159,29 +288,73 @@ def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
+    global stats, last_stats
+    if not instrumented:
+        return optimal_action(board)
+
+    stats = SearchStats()
+    start = time.perf_counter()
+    try:
+        return optimal_action(board)
+    finally:
+        stats.seconds = time.perf_counter() - start
+        last_stats = stats
+        stats = None
+
+
+def optimal_action(board):
+    """
+    Returns the optimal action for the current player on the board,
+    from the opening book or else by alpha-beta search.
+    """
     action = None
     # alpha: max. value that X can guarantee
     # beta: min. value that O can guarantee
     start_alpha = -math.inf
     start_beta = math.inf
 
-    if terminal(board):
+    # Search on the bitboard form of the board
+    board = bitboard.from_board(board)
+    if bitboard.terminal(board):
         return action
 
-    if player(board) == X:
-        value = -math.inf
-        for possible_action in actions(board):
-            action_value = min_value(result(board, possible_action), start_alpha, start_beta)
-            if action_value > value:
-                value = action_value
-                action = possible_action
-        return action
-    
-    if player(board) == O:
-        value = math.inf
-        for possible_action in actions(board):
-            action_value = max_value(result(board, possible_action), start_alpha, start_beta)
-            if action_value < value:
-                value = action_value
-                action = possible_action
-        return action
\ No newline at end of file
+    # Every legal position is in the opening book; search is the fallback
+    if use_book:
+        entry = book.lookup(board)
+        if entry is not None:
+            if stats is not None:
+                stats.book_hits += 1
+            return divmod(entry[1][0], 3)
+
+    # Searched positions (or their mirror images) are answered right away
+    key, symmetry = bitboard.canonical(board)
+    entry = transpositions.get(key)
+    if entry is None or entry[1] != EXACT or entry[2] is None:
+        if bitboard.player(board) == X:
+            max_value(board, start_alpha, start_beta)
+        else:
+            min_value(board, start_alpha, start_beta)
+        entry = transpositions[key]
+    elif stats is not None:
+        stats.cache_hits += 1
+    return divmod(bitboard.from_canonical(entry[2], symmetry), 3)
+
+
+def instrument(enabled=True):
+    """
+    Turns recording a SearchStats for every minimax call (available as
+    last_stats afterwards) on or off.
+    """
+    global instrumented
+    instrumented = enabled
+
+
+def profile(board, path):
+    """
+    Runs minimax on the board under cProfile, writes the trace to path
+    (readable with pstats or any cProfile viewer) and returns the action.
+    """
+    profiler = cProfile.Profile()
+    action = profiler.runcall(minimax, board)
+    profiler.dump_stats(path)
+    return action